@@ -1,67 +1,38 @@
-import os
-import re
 import argparse
 from pathlib import Path
 from dotenv import load_dotenv
-from label_studio_sdk.client import LabelStudio
-
-# 复用字幕解析函数
-
-
-def parse_time(time_str):
-    h, m, s = time_str.split(':')
-    return float(h) * 3600 + float(m) * 60 + float(s)
-
-
-def parse_subtitle_line(line):
-    pattern = r'Dialogue: \d+,(\d+:\d+:\d+\.\d+),(\d+:\d+:\d+\.\d+),([^,]+),,.*?,,(.*)'
-    match = re.match(pattern, line)
-    if match:
-        start_time, end_time, style, text = match.groups()
-        text = re.sub(r'\{[^}]*\}', '', text)
-        return {
-            'start': parse_time(start_time),
-            'end': parse_time(end_time),
-            'text': text.strip()
-        }
-    return None
-
-
-def read_subtitle_file(file_path, language=None):
-    subtitles = []
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            if line.startswith('Dialogue:'):
-                if language is None or language in line:
-                    subtitle = parse_subtitle_line(line)
-                    if subtitle:
-                        subtitles.append(subtitle)
-    return subtitles
-
-
-def create_annotation_result(subtitles):
-    results = []
-    for subtitle in subtitles:
-        result = {
-            'from_name': 'transcription',
-            'to_name': 'audio',
-            'type': 'textarea',
-            'value': {
-                'start': subtitle['start'],
-                'end': subtitle['end'],
-                'text': [subtitle['text']],
-                'channel': 0,
-            }
-        }
-        results.append(result)
-    return results
-
-
-def get_audio_file_path(audio_file: Path):
-    local_storage_path = os.environ['LABEL_STUDIO_LOCAL_FILES_DOCUMENT_ROOT']
-    relative_path = audio_file.relative_to(local_storage_path)
-    uri = f'/data/local-files/?d={relative_path}'
-    return uri
+
+from audio_label_studio.segment import (
+    plan_segments, cut_segments, segment_task_data, shift_subtitles)
+from audio_label_studio.waveform import PROXY_FORMATS
+from audio_label_studio.align import snap_subtitles
+from audio_label_studio.subtitle import read_subtitle_file, create_annotation_result
+from audio_label_studio.tasks import get_audio_file_path, get_audio_task_data
+from audio_label_studio.client import get_client
+from audio_label_studio.profiling import add_profile_arguments, start_profile_from_args
+
+
+def create_segment_tasks(audio_file, sub_file, subtitles, clip_dir, args):
+    """
+    按字幕时间轴把整集音频切成多个片段，每个片段一个任务
+
+    切片在一次ffmpeg调用中完成，任务数据中的 offset 用于导出时还原整集时间
+    """
+    segments = plan_segments(subtitles, mode=args.segment,
+                             window=args.window, padding=args.padding)
+    if not segments:
+        return []
+    clip_files = cut_segments(audio_file, segments, clip_dir / audio_file.stem)
+    print(f"音频 {audio_file.name} 已切分为 {len(clip_files)} 个片段")
+
+    tasks = []
+    for segment, clip_file in zip(segments, clip_files):
+        task_data = segment_task_data(
+            segment, get_audio_file_path(clip_file), audio_file.name)
+        tasks.append({'data': task_data,
+                      'subtitles': shift_subtitles(segment['subtitles'], segment['start']),
+                      'audio_file': clip_file, 'sub_file': sub_file})
+    return tasks
 
 
 def main():
@@ -73,13 +44,28 @@ def main():
     parser.add_argument('--language', default='Dial_JP', help='字幕语言代码，可选')
     parser.add_argument('--env', default='.env.prod',
                         help='环境变量文件，默认.env.prod')
+    parser.add_argument('--segment', choices=['line', 'window'], default=None,
+                        help='按字幕切分音频：line 每句一个任务，window 按时间窗口合并，默认不切分')
+    parser.add_argument('--window', type=float, default=30.0,
+                        help='window 模式下每个切片的最大时长（秒），默认30')
+    parser.add_argument('--padding', type=float, default=0.2,
+                        help='切片前后保留的时长（秒），默认0.2')
+    parser.add_argument('--clip-dir', default=None,
+                        help='切片输出目录，需位于Label Studio本地存储目录下，默认<audio-dir>/clips')
+    parser.add_argument('--proxy-dir', default=None,
+                        help='build_audio_proxies.py 的输出目录，指定后任务使用压缩代理音频和波形峰值')
+    parser.add_argument('--proxy-format', choices=list(PROXY_FORMATS.keys()), default='opus',
+                        help='代理音频格式，默认opus')
+    parser.add_argument('--snap', action='store_true',
+                        help='上传前根据音频能量将字幕边界吸附到最近的语音起止点')
+    parser.add_argument('--snap-tolerance', type=float, default=0.3,
+                        help='边界吸附的最大距离（秒），默认0.3')
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    start_profile_from_args(args, 'batch_audio_subtitle_to_label_studio')
 
     load_dotenv(args.env)
-    ls = LabelStudio(
-        base_url=os.environ['LABEL_STUDIO_URL'],
-        api_key=os.environ['LABEL_STUDIO_TOKEN'],
-    )
+    client = get_client()
 
     audio_dir = Path(args.audio_dir)
     subtitle_dir = Path(args.subtitle_dir)
@@ -98,37 +84,45 @@ def main():
             continue
         audio_to_subs[audio_file] = sub_files
 
+    clip_dir = Path(args.clip_dir) if args.clip_dir else audio_dir / 'clips'
     for audio_file, sub_files in audio_to_subs.items():
         # 这里只取第一个字幕文件，如果有多个可自行扩展
         sub_file = sub_files[0]
         subtitles = read_subtitle_file(sub_file, args.language)
+        if args.snap and subtitles:
+            subtitles = snap_subtitles(audio_file, subtitles, args.snap_tolerance)
+            print(f"音频 {audio_file.name} 的字幕边界已校正")
+        if args.segment:
+            tasks.extend(create_segment_tasks(
+                audio_file, sub_file, subtitles, clip_dir, args))
+            continue
         # 构造任务数据
         # 这里假设音频文件可通过本地路径访问，实际部署时建议用URL或挂载到Label Studio可访问的路径
-        task_data = {
-            'audio': get_audio_file_path(audio_file)
-        }
+        task_data = get_audio_task_data(
+            audio_file, args.proxy_dir, args.proxy_format)
         tasks.append({'data': task_data, 'subtitles': subtitles,
                      'audio_file': audio_file, 'sub_file': sub_file})
 
     # 批量导入任务
-    import_tasks = [{'audio': t['data']['audio']} for t in tasks]
+    import_tasks = [{'data': t['data']} for t in tasks]
     print(f"准备导入{len(import_tasks)}个任务到项目{args.project_id}")
-    task_ids = []
-    for t in import_tasks:
-        task = ls.tasks.create(data=t, project=args.project_id)
-        task_ids.append(task.id)
-        print(f"已创建任务 {task.id}")
+    task_ids = client.import_tasks(args.project_id, import_tasks)
     print(f"已创建{len(task_ids)}个任务")
 
     # 上传annotation
+    annotations = []
     for t, task_id in zip(tasks, task_ids):
         results = create_annotation_result(t['subtitles'])
         if not results:
             print(f"警告: {t['audio_file'].name} 没有可用字幕，跳过标注上传")
             continue
-        ls.annotations.create(id=task_id, result=results)
-        print(f"音频 {t['audio_file'].name} 的字幕已作为标注上传到任务 {task_id}")
+        annotations.append((task_id, results))
+    client.create_annotations(annotations)
+    print(f"已上传{len(annotations)}个字幕标注")
 
+    stats = client.stats.snapshot()
+    print(f"API调用: {stats['calls']} 次，重试: {stats['retries']} 次，"
+          f"平均耗时: {stats['latency_avg']:.3f}s")
     print("全部任务和字幕标注已完成！")
 
 
@@ -1,17 +1,10 @@
 import os
 import argparse
-import requests
 from glob import glob
 from dotenv import load_dotenv
-from label_studio_sdk.client import LabelStudio
 
-# 配置 Label Studio API
-LABEL_STUDIO_URL = os.environ.get('LABEL_STUDIO_URL', 'http://localhost:8080')
-API_TOKEN = os.environ.get('LABEL_STUDIO_API_TOKEN', 'YOUR_API_TOKEN')
-
-HEADERS = {
-    'Authorization': f'Token {API_TOKEN}'
-}
+from audio_label_studio.client import get_client, LabelStudioError
+from audio_label_studio.profiling import add_profile_arguments, start_profile_from_args
 
 
 def upload_image_to_label_studio(project_id, image_path):
@@ -19,18 +12,15 @@ def upload_image_to_label_studio(project_id, image_path):
     上传单张图片到 label-studio 作为任务
     """
     with open(image_path, 'rb') as f:
-        files = {'file': (os.path.basename(image_path),
-                          f, 'application/octet-stream')}
-        response = requests.post(
-            f'{LABEL_STUDIO_URL}/api/projects/{project_id}/import',
-            headers=HEADERS,
-            files=files
-        )
-    if response.status_code == 201:
+        # 读入内存，保证请求重试时可以重新发送文件内容
+        content = f.read()
+    files = {'file': (os.path.basename(image_path),
+                      content, 'application/octet-stream')}
+    try:
+        get_client().request('POST', f'/api/projects/{project_id}/import', files=files)
         print(f"成功上传: {image_path}")
-    else:
-        print(
-            f"上传失败: {image_path}, 状态码: {response.status_code}, 响应: {response.text}")
+    except LabelStudioError as e:
+        print(f"上传失败: {image_path}, {e}")
 
 
 def get_image_file_path(image_file):
@@ -50,13 +40,12 @@ def main():
     parser.add_argument('--src-dir', required=True, help='图片所在目录')
     parser.add_argument('--env', default='.env.prod',
                         help='环境变量文件，默认.env.prod')
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    start_profile_from_args(args, 'batch_import_image_as_task')
 
     load_dotenv(args.env)
-    ls = LabelStudio(
-        base_url=os.environ['LABEL_STUDIO_URL'],
-        api_key=os.environ['LABEL_STUDIO_TOKEN'],
-    )
+    client = get_client()
 
     # 支持的图片格式
     exts = ['*.jpg', '*.jpeg', '*.png', '*.bmp', '*.gif']
@@ -69,11 +58,11 @@ def main():
         return
 
     print(f'共找到 {len(image_files)} 张图片，开始上传...')
-    for img_path in image_files:
-        image_url = get_image_file_path(img_path)
-        task_data = {'ocr': image_url}
-        task = ls.tasks.create(data=task_data, project=args.project_id)
-        print(f"已创建任务 {task.id}，图片: {img_path}")
+    tasks = [{'data': {'ocr': get_image_file_path(img_path)}}
+             for img_path in image_files]
+    task_ids = client.import_tasks(args.project_id, tasks)
+    for task_id, img_path in zip(task_ids, image_files):
+        print(f"已创建任务 {task_id}，图片: {img_path}")
 
     print('全部上传完成！')
 
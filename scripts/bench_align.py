@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import wave
+import resource
+import argparse
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from audio_label_studio.align import (
+    frame_energy, detect_speech_boundaries, snap_to_boundaries)
+from audio_label_studio.profiling import add_profile_arguments, start_profile_from_args
+
+
+def write_synthetic_wav(path, hours, sample_rate, seed=0):
+    """
+    按块生成带有语音段的合成WAV，内存占用与时长无关
+
+    语音段为较响的噪声突发，段间为低电平底噪。
+
+    Returns:
+        list: 真实语音段 [{'start', 'end', 'text'}, ...]
+    """
+    rng = np.random.default_rng(seed)
+    total = int(hours * 3600 * sample_rate)
+    segments = []
+    t = 0.5
+    while t < hours * 3600 - 5:
+        duration = rng.uniform(0.8, 4.0)
+        segments.append({'start': t, 'end': t + duration, 'text': ''})
+        t += duration + rng.uniform(0.4, 3.0)
+
+    starts = np.array([s['start'] for s in segments])
+    ends = np.array([s['end'] for s in segments])
+    chunk = sample_rate * 60
+    with wave.open(str(path), 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        for offset in range(0, total, chunk):
+            n = min(chunk, total - offset)
+            times = (offset + np.arange(n)) / sample_rate
+            idx = np.searchsorted(starts, times, side='right') - 1
+            in_speech = (idx >= 0) & (times < ends[np.maximum(idx, 0)])
+            amplitude = np.where(in_speech, 8000.0, 60.0)
+            samples = rng.standard_normal(n) * amplitude
+            w.writeframes(np.clip(samples, -32768, 32767).astype('<i2').tobytes())
+    return segments
+
+
+def jitter(segments, max_shift, seed=1):
+    rng = np.random.default_rng(seed)
+    shifts = rng.uniform(-max_shift, max_shift, size=(len(segments), 2))
+    return [{**s, 'start': s['start'] + a, 'end': s['end'] + b}
+            for s, (a, b) in zip(segments, shifts)]
+
+
+def mean_error(truth, subtitles):
+    errors = [abs(t['start'] - s['start']) + abs(t['end'] - s['end'])
+              for t, s in zip(truth, subtitles)]
+    return float(np.mean(errors)) / 2
+
+
+def peak_rss_mb():
+    # ru_maxrss 会继承 fork 时父进程的峰值，Linux 下优先读取只统计本进程的 VmHWM
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Linux 下 ru_maxrss 单位为 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_alignment(wav_path, subtitles, tolerance):
+    """
+    在独立进程中运行对齐，峰值内存只反映对齐本身，不含生成音频的开销
+    """
+    rss_before = peak_rss_mb()
+    t0 = time.perf_counter()
+    energy, frame_seconds = frame_energy(wav_path)
+    t1 = time.perf_counter()
+    onsets, offsets = detect_speech_boundaries(energy, frame_seconds)
+    t2 = time.perf_counter()
+    snapped = snap_to_boundaries(subtitles, onsets, offsets, tolerance)
+    t3 = time.perf_counter()
+    return {
+        'snapped': snapped,
+        'timings': (t1 - t0, t2 - t1, t3 - t2),
+        'rss_before': rss_before,
+        'rss_peak': peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='字幕边界吸附性能测试')
+    parser.add_argument('--hours', type=float, default=1.0,
+                        help='合成音频时长（小时），默认1')
+    parser.add_argument('--sample-rate', type=int, default=48000,
+                        help='采样率，默认48000')
+    parser.add_argument('--jitter', type=float, default=0.3,
+                        help='字幕时间随机偏移的最大值（秒），默认0.3')
+    parser.add_argument('--tolerance', type=float, default=0.4,
+                        help='吸附容差（秒），默认0.4')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile_from_args(args, 'bench_align')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wav_path = os.path.join(tmp, 'bench.wav')
+        print(f'正在生成 {args.hours} 小时的合成音频...')
+        truth = write_synthetic_wav(wav_path, args.hours, args.sample_rate)
+        size_mb = os.path.getsize(wav_path) / 1024 / 1024
+        subtitles = jitter(truth, args.jitter)
+
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(
+                run_alignment, wav_path, subtitles, args.tolerance).result()
+
+    energy_seconds, detect_seconds, snap_seconds = result['timings']
+    snapped = result['snapped']
+    print(f'音频大小: {size_mb:.1f} MB, 字幕数: {len(truth)}')
+    print(f'能量计算: {energy_seconds:.2f}s ({size_mb / energy_seconds:.0f} MB/s)')
+    print(f'语音检测: {detect_seconds:.3f}s')
+    print(f'边界吸附: {snap_seconds:.3f}s')
+    print(f"对齐进程峰值内存: {result['rss_peak']:.1f} MB "
+          f"(开始对齐前 {result['rss_before']:.1f} MB)")
+    print(f'平均边界误差: {mean_error(truth, subtitles) * 1000:.0f} ms -> '
+          f'{mean_error(truth, snapped) * 1000:.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import argparse
+from pathlib import Path
+
+from audio_label_studio.waveform import (
+    PROXY_FORMATS, proxy_paths, make_proxy, write_peaks)
+from audio_label_studio.profiling import add_profile_arguments, start_profile_from_args
+
+
+def is_up_to_date(source: Path, target: Path):
+    return target.exists() and target.stat().st_mtime >= source.stat().st_mtime
+
+
+def build_audio_proxies(input_dir: str, output_dir: str, proxy_format: str = 'opus',
+                        bitrate: str = '48k', samples_per_pixel: int = 512,
+                        force: bool = False):
+    """
+    为目录中的WAV文件生成压缩代理音频和波形峰值文件
+
+    Args:
+        input_dir: WAV音频目录
+        output_dir: 代理音频和峰值文件的输出目录
+        proxy_format: 代理音频格式（opus或mp3）
+        bitrate: 代理音频码率
+        samples_per_pixel: 峰值数据每个像素对应的采样数
+        force: 是否忽略已有的输出重新生成
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    for audio_file in sorted(Path(input_dir).glob('*.wav')):
+        proxy_path, peaks_path = proxy_paths(audio_file, output_dir, proxy_format)
+        print(f'正在处理: {audio_file.name}')
+        try:
+            if force or not is_up_to_date(audio_file, proxy_path):
+                make_proxy(audio_file, proxy_path, proxy_format, bitrate)
+                print(f'代理音频: {proxy_path.name}')
+            if force or not is_up_to_date(audio_file, peaks_path):
+                peaks = write_peaks(audio_file, peaks_path, samples_per_pixel)
+                print(f'波形峰值: {peaks_path.name} ({peaks["length"]} 像素)')
+        except subprocess.CalledProcessError as e:
+            print(f'处理 {audio_file.name} 时出错: {e.stderr.decode("utf-8", "ignore")}')
+        except Exception as e:
+            print(f'发生错误: {str(e)}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='为WAV音频生成压缩代理和波形峰值数据')
+    parser.add_argument('input_dir', help='WAV音频目录路径')
+    parser.add_argument('output_dir', help='输出目录路径')
+    parser.add_argument('-f', '--format', default='opus',
+                        choices=list(PROXY_FORMATS.keys()),
+                        help='代理音频格式 (默认: opus)')
+    parser.add_argument('-b', '--bitrate', default='48k',
+                        help='代理音频码率 (默认: 48k)')
+    parser.add_argument('--samples-per-pixel', type=int, default=512,
+                        help='波形峰值每个像素对应的采样数 (默认: 512)')
+    parser.add_argument('--force', action='store_true',
+                        help='忽略已有输出，重新生成')
+
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile_from_args(args, 'build_audio_proxies')
+
+    # 检查ffmpeg是否可用
+    try:
+        subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        print('错误: 未找到ffmpeg。请确保ffmpeg已安装并添加到系统PATH中。')
+        return
+
+    build_audio_proxies(args.input_dir, args.output_dir, args.format,
+                        args.bitrate, args.samples_per_pixel, args.force)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import json
+import argparse
+from pathlib import Path
+from collections import defaultdict
+from dotenv import load_dotenv
+
+from audio_label_studio.client import get_client
+from audio_label_studio.segment import restore_episode_timecodes
+from audio_label_studio.profiling import add_profile_arguments, start_profile_from_args
+
+
+def collect_episode_results(tasks):
+    """
+    将切片任务的标注按整集分组，并还原为整集时间轴
+
+    Args:
+        tasks: Label Studio 导出的 JSON 任务列表
+
+    Returns:
+        dict: {episode: [result, ...]}，按开始时间排序
+    """
+    episodes = defaultdict(list)
+    for task in tasks:
+        data = task.get('data', {})
+        episode = data.get('episode')
+        if not episode:
+            continue
+        offset = data.get('offset', 0.0)
+        annotations = [a for a in task.get('annotations', [])
+                       if not a.get('was_cancelled')]
+        if not annotations:
+            continue
+        # 取最后一次提交的标注
+        annotation = annotations[-1]
+        episodes[episode].extend(
+            restore_episode_timecodes(annotation.get('result', []), offset))
+
+    for results in episodes.values():
+        results.sort(key=lambda r: r.get('value', {}).get('start', 0.0))
+    return episodes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='将切片任务的标注还原为整集时间轴并导出')
+    parser.add_argument('output_dir', help='输出目录，每集一个 JSON 文件')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--export-file', help='Label Studio 导出的 JSON 文件')
+    source.add_argument('--project-id', type=int, help='直接从 Label Studio 项目分页读取任务')
+    parser.add_argument('--env', default='.env.prod',
+                        help='环境变量文件，默认.env.prod')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile_from_args(args, 'export_segment_annotations')
+
+    if args.export_file:
+        with open(args.export_file, 'r', encoding='utf-8') as f:
+            tasks = json.load(f)
+    else:
+        load_dotenv(args.env)
+        tasks = get_client().iter_tasks(args.project_id, fields='all')
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    episodes = collect_episode_results(tasks)
+    for episode, results in episodes.items():
+        output_path = output_dir / f"{Path(episode).stem}.json"
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump({'episode': episode, 'result': results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"已导出 {episode}: {len(results)} 条标注 -> {output_path}")
+
+    print(f"共导出 {len(episodes)} 集")
+
+
+if __name__ == '__main__':
+    main()
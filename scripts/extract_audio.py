@@ -6,6 +6,9 @@ import subprocess
 import argparse
 from pathlib import Path
 
+from audio_label_studio.extract import AUDIO_CODECS, VIDEO_EXTENSIONS, extract_audio_file
+from audio_label_studio.profiling import add_profile_arguments, start_profile_from_args
+
 def extract_audio(input_dir: str, output_dir: str, output_format: str = 'wav'):
     """
     从指定目录的视频文件中提取音频
@@ -18,47 +21,21 @@ def extract_audio(input_dir: str, output_dir: str, output_format: str = 'wav'):
     # 确保输出目录存在
     os.makedirs(output_dir, exist_ok=True)
     
-    # 支持的视频格式
-    video_extensions = ('.mp4', '.avi', '.mkv', '.mov', '.wmv')
-    
-    # 支持的音频格式及其对应的编码器
-    audio_codecs = {
-        'wav': 'pcm_s16le',  # WAV格式使用PCM编码
-        'mp3': 'libmp3lame',  # MP3格式
-        'aac': 'aac',        # AAC格式
-        'flac': 'flac'       # FLAC格式
-    }
-    
-    if output_format not in audio_codecs:
-        raise ValueError(f'不支持的音频格式: {output_format}。支持的格式: {", ".join(audio_codecs.keys())}')
+    if output_format not in AUDIO_CODECS:
+        raise ValueError(f'不支持的音频格式: {output_format}。支持的格式: {", ".join(AUDIO_CODECS.keys())}')
     
     # 遍历输入目录中的所有文件
     for file in os.listdir(input_dir):
-        if file.lower().endswith(video_extensions):
+        if file.lower().endswith(VIDEO_EXTENSIONS):
             input_path = os.path.join(input_dir, file)
             # 将视频文件名转换为音频文件名（替换扩展名）
             output_filename = os.path.splitext(file)[0] + f'.{output_format}'
             output_path = os.path.join(output_dir, output_filename)
             
-            # 构建ffmpeg命令
-            command = [
-                'ffmpeg',
-                '-i', input_path,
-                '-vn',  # 不处理视频
-                '-acodec', audio_codecs[output_format],  # 使用指定的音频编码器
-                '-y',  # 覆盖已存在的文件
-            ]
-            
-            # 为MP3格式添加质量参数
-            if output_format == 'mp3':
-                command.extend(['-q:a', '2'])  # 设置音频质量（2是较高质量）
-            
-            command.append(output_path)
-            
             try:
                 print(f'正在处理: {file}')
                 # 执行ffmpeg命令
-                subprocess.run(command, check=True, capture_output=True)
+                extract_audio_file(input_path, output_path, output_format)
                 print(f'完成: {output_filename}')
             except subprocess.CalledProcessError as e:
                 print(f'处理 {file} 时出错: {str(e)}')
@@ -73,7 +50,9 @@ def main():
                       choices=['wav', 'mp3', 'aac', 'flac'],
                       help='输出音频格式 (默认: wav)')
     
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    start_profile_from_args(args, 'extract_audio')
     
     # 检查ffmpeg是否可用
     try:
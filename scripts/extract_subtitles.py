@@ -1,108 +1,81 @@
 import os
 import subprocess
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from dotenv import load_dotenv
 
+from audio_label_studio.extract import extract_subtitle_tracks
+from audio_label_studio.profiling import add_profile_arguments, start_profile_from_args
+
 load_dotenv('.env.prod')
 
 
 def extract_subtitles(mkv_path, output_dir):
     """
     使用mkvextract从MKV文件中提取字幕
+
+    每个文件只调用一次 mkvmerge -J 获取轨道信息，
+    并用一次 mkvextract tracks 调用提取全部字幕轨道。
     """
     mkv_path = Path(mkv_path)
-    output_dir = Path(output_dir)
-
-    # 确保输出目录存在
-    output_dir.mkdir(parents=True, exist_ok=True)
-
-    # 使用mkvinfo检查字幕轨道
-    cmd_info = ['mkvinfo', str(mkv_path)]
     try:
-        info = subprocess.check_output(cmd_info, stderr=subprocess.STDOUT)
-        info = info.decode('utf-8')
+        outputs = extract_subtitle_tracks(mkv_path, output_dir)
     except subprocess.CalledProcessError as e:
-        print(f"无法获取MKV文件信息: {mkv_path}\n错误: {e.output}")
-        return
+        print(f"提取字幕失败: {mkv_path}\n错误: {e.output}")
+        return []
     except Exception as e:
         print("其他问题", e)
-        return
-
-    # 查找所有字幕轨道
-    subtitle_tracks = []
-    current_track = None
-    for line in info.split('\n'):
-        line = line.strip()
-        if '+ 轨道编号:' in line:
-            current_track = line.split(':')[1].strip().split()[0]
-            current_track = int(current_track) - 1
-            current_track = str(current_track)
-        elif current_track and '轨道类型: 字幕' in line:
-            subtitle_tracks.append(current_track)
-
-    if not subtitle_tracks:
-        print(f"未找到字幕轨道: {mkv_path}", info)
-        return
-
-    # 为每个字幕轨道提取字幕
-    for track in subtitle_tracks:
-        # 获取字幕语言
-        cmd_lang = ['mkvinfo', str(mkv_path)]
-        lang = 'und'  # 默认未知语言
-        try:
-            info = subprocess.check_output(
-                cmd_lang, stderr=subprocess.STDOUT, text=True)
-            for line in info.split('\n'):
-                line = line.strip()
-                if f'轨道号: {track}' in line:
-                    # 查找语言
-                    if '语言:' in line:
-                        lang = line.split('语言:')[1].strip().split()[0].lower()
-                    break
-        except:
-            pass
+        return []
 
-        # 构建输出文件名
-        output_name = f"{mkv_path.stem}_sub{track}_{lang}.sub"
-        output_path = output_dir / output_name
+    if not outputs:
+        print(f"未找到字幕轨道: {mkv_path}")
+        return []
 
-        # 使用mkvextract提取字幕
-        cmd_extract = ['mkvextract', 'tracks', str(
-            mkv_path), f"{track}:{output_path}"]
-        try:
-            subprocess.run(cmd_extract, check=True)
-            print(f"提取字幕成功: {output_path}")
-        except subprocess.CalledProcessError as e:
-            print(f"提取字幕失败: {mkv_path} 轨道 {track}\n错误: {e}")
+    for output_path in outputs:
+        print(f"提取字幕成功: {output_path}")
+    return outputs
 
 
-def process_directory(input_dir, output_dir):
+def process_directory(input_dir, output_dir, workers=None):
     """
-    处理目录下的所有MKV文件
+    处理目录下的所有MKV文件，多个文件在线程池中并行处理
     """
     input_dir = Path(input_dir)
     if not input_dir.is_dir():
         print(f"错误: 输入目录不存在: {input_dir}")
         return
 
-    for item in input_dir.glob('**/*.mkv'):
-        extract_subtitles(item, output_dir)
+    mkv_files = list(input_dir.glob('**/*.mkv'))
+    workers = workers or min(8, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(extract_subtitles, item, output_dir): item
+                   for item in mkv_files}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"处理 {futures[future]} 时出错: {e}")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='从MKV文件中提取字幕')
     parser.add_argument('input_dir', help='包含MKV文件的输入目录')
     parser.add_argument('output_dir', help='输出字幕文件的目录')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='并行处理的文件数，默认为CPU核数(最多8)')
 
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    start_profile_from_args(args, 'extract_subtitles')
 
-    # 检查mkvextract是否可用
-    try:
-        subprocess.run(['mkvextract', '--version'], check=True,
-                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    except:
-        print("错误: mkvextract未安装或不在PATH中。请安装MKVToolNix。")
-        exit(1)
+    # 检查mkvmerge和mkvextract是否可用
+    for tool in ('mkvmerge', 'mkvextract'):
+        try:
+            subprocess.run([tool, '--version'], check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except:
+            print(f"错误: {tool}未安装或不在PATH中。请安装MKVToolNix。")
+            exit(1)
 
-    process_directory(args.input_dir, args.output_dir)
+    process_directory(args.input_dir, args.output_dir, args.workers)
@@ -0,0 +1,68 @@
+import argparse
+from pathlib import Path
+from dotenv import load_dotenv
+
+from audio_label_studio.client import get_client
+from audio_label_studio.pipeline import PipelineConfig, find_videos, run_pipeline
+from audio_label_studio.waveform import PROXY_FORMATS
+from audio_label_studio.profiling import add_profile_arguments, start_profile_from_args
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='增量流水线：视频 → 音频 + 字幕 → Label Studio任务')
+    parser.add_argument('input_dir', help='视频文件目录')
+    parser.add_argument('--audio-dir', required=True, help='音频输出目录')
+    parser.add_argument('--subtitle-dir', required=True, help='字幕输出目录')
+    parser.add_argument('--state-dir', default=None,
+                        help='流水线状态目录，默认<audio-dir>/.pipeline')
+    parser.add_argument('--proxy-dir', default=None,
+                        help='代理音频和波形峰值输出目录，不指定则跳过该步骤')
+    parser.add_argument('--proxy-format', choices=list(PROXY_FORMATS.keys()), default='opus',
+                        help='代理音频格式，默认opus')
+    parser.add_argument('--project-id', type=int, default=None,
+                        help='Label Studio项目ID，不指定则只提取音频和字幕')
+    parser.add_argument('--language', default='Dial_JP', help='字幕语言代码，可选')
+    parser.add_argument('--snap', action='store_true',
+                        help='导入前将字幕边界吸附到最近的语音起止点')
+    parser.add_argument('--snap-tolerance', type=float, default=0.3,
+                        help='边界吸附的最大距离（秒），默认0.3')
+    parser.add_argument('-j', '--workers', type=int, default=4,
+                        help='并行执行的步骤数，默认4')
+    parser.add_argument('--env', default='.env.prod',
+                        help='环境变量文件，默认.env.prod')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile_from_args(args, 'run_pipeline')
+
+    load_dotenv(args.env)
+    client = None
+    if args.project_id is not None:
+        client = get_client()
+
+    audio_dir = Path(args.audio_dir)
+    config = PipelineConfig(
+        audio_dir=audio_dir,
+        subtitle_dir=args.subtitle_dir,
+        state_dir=args.state_dir or audio_dir / '.pipeline',
+        proxy_dir=args.proxy_dir,
+        proxy_format=args.proxy_format,
+        project_id=args.project_id,
+        language=args.language,
+        snap_tolerance=args.snap_tolerance if args.snap else None,
+        client=client,
+    )
+
+    videos = find_videos(args.input_dir)
+    print(f"共找到{len(videos)}个视频文件")
+    jobs = run_pipeline(videos, config, args.workers, args.input_dir)
+
+    failed = [job for job in jobs if 'failed' in job.status.values()]
+    print(f"完成: {len(jobs) - len(failed)} 个视频，失败: {len(failed)} 个视频")
+    for job in failed:
+        steps = [name for name, status in job.status.items() if status == 'failed']
+        print(f"  {job.name}: {', '.join(steps)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,76 +1,33 @@
 import os
-import re
 import argparse
 from datetime import datetime
 from dotenv import load_dotenv
 from label_studio_sdk.label_interface import LabelInterface
-from label_studio_sdk.client import LabelStudio
 
-def parse_time(time_str):
-    """将时间字符串转换为秒数"""
-    h, m, s = time_str.split(':')
-    return float(h) * 3600 + float(m) * 60 + float(s)
+from audio_label_studio.client import get_client
+from audio_label_studio.subtitle import read_subtitle_file, create_annotation_result
+from audio_label_studio.profiling import add_profile_arguments, start_profile_from_args
 
-def parse_subtitle_line(line):
-    """解析字幕行，返回开始时间、结束时间和文本"""
-    pattern = r'Dialogue: \d+,(\d+:\d+:\d+\.\d+),(\d+:\d+:\d+\.\d+),([^,]+),,.*?,,(.*)'
-    match = re.match(pattern, line)
-    if match:
-        start_time, end_time, style, text = match.groups()
-        # 移除文本中的样式标签
-        text = re.sub(r'\{[^}]*\}', '', text)
-        return {
-            'start': parse_time(start_time),
-            'end': parse_time(end_time),
-            'text': text.strip()
-        }
-    return None
-
-def read_subtitle_file(file_path, language='IN_CH_EP13-CHS'):
-    """读取字幕文件并返回指定语言的字幕"""
-    subtitles = []
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            if line.startswith('Dialogue:') and language in line:
-                subtitle = parse_subtitle_line(line)
-                if subtitle:
-                    subtitles.append(subtitle)
-    return subtitles
+DEFAULT_LANGUAGE = 'IN_CH_EP13-CHS'
 
 def create_label_studio_annotation(subtitles, task_id):
     """创建 Label Studio 标注"""
-    load_dotenv('.env.prod')
-    
-    ls = LabelStudio(
-        base_url=os.environ['LABEL_STUDIO_URL'],
-        api_key=os.environ['LABEL_STUDIO_TOKEN'],
-    )
-    
     # 为每个字幕创建时间戳标注
-    results = []
-    for subtitle in subtitles:
-        result = {
-            'from_name': 'transcription',
-            'to_name': 'audio',
-            'type': 'textarea',
-            'value': {
-                'start': subtitle['start'],
-                'end': subtitle['end'],
-                'text': [subtitle['text']],
-                "channel": 0,
-            }
-        }
-        results.append(result)
-    ls.annotations.create(id=task_id, result=results)
+    results = create_annotation_result(subtitles)
+    get_client().create_annotation(task_id, results)
 
 def main():
     # 设置命令行参数
     parser = argparse.ArgumentParser(description='将字幕文件导入到 Label Studio')
     parser.add_argument('sub_file', help='字幕文件路径')
-    parser.add_argument('lang', help='字幕语言代码 (例如: IN_CH_EP13-CHS, IN_JP_EP13)')
+    parser.add_argument('lang', nargs='?', default=DEFAULT_LANGUAGE,
+                        help=f'字幕语言代码 (例如: IN_CH_EP13-CHS, IN_JP_EP13)，默认{DEFAULT_LANGUAGE}')
     parser.add_argument('--task-id', type=int, help='Label Studio 任务 ID (不提供则仅打印字幕信息)')
     
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    start_profile_from_args(args, 'subtitle_to_label_studio')
+    load_dotenv('.env.prod')
     
     # 读取字幕
     subtitles = read_subtitle_file(args.sub_file, args.lang)
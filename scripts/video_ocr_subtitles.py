@@ -0,0 +1,66 @@
+import json
+import argparse
+from pathlib import Path
+from dotenv import load_dotenv
+
+from audio_label_studio.client import get_client
+from audio_label_studio.model import HuoshanOCRModel, TesseractOCRModel
+from audio_label_studio.subtitle import create_annotation_result
+from audio_label_studio.video_ocr import extract_hard_subtitles
+from audio_label_studio.profiling import add_profile_arguments, start_profile_from_args
+
+
+def load_model(name):
+    if name == 'tesseract':
+        return TesseractOCRModel()
+    return HuoshanOCRModel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='从视频画面中识别硬字幕并生成时间轴文本')
+    parser.add_argument('video', help='视频文件路径')
+    parser.add_argument('--output', default=None,
+                        help='输出JSON文件，默认为 <视频名>.ocr.json')
+    parser.add_argument('--model', choices=['huoshan', 'tesseract'], default='huoshan',
+                        help='OCR模型，默认huoshan')
+    parser.add_argument('--fps', type=float, default=2.0, help='采样帧率，默认2')
+    parser.add_argument('--band', type=float, nargs=2, default=[0.75, 1.0],
+                        metavar=('TOP', 'BOTTOM'),
+                        help='字幕区域在画面中的上下边界（按高度比例），默认 0.75 1.0')
+    parser.add_argument('--hash-threshold', type=int, default=12,
+                        help='判定字幕变化的感知哈希汉明距离，默认12')
+    parser.add_argument('--task-id', type=int, default=None,
+                        help='Label Studio 任务ID，提供时将识别结果作为标注上传')
+    parser.add_argument('--to-name', default='audio',
+                        help='标注配置中音频/视频对象的名称，默认audio')
+    parser.add_argument('--env', default='.env.prod',
+                        help='环境变量文件，默认.env.prod')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile_from_args(args, 'video_ocr_subtitles')
+
+    load_dotenv(args.env)
+    model = load_model(args.model)
+
+    segments, stats = extract_hard_subtitles(
+        args.video, model, fps=args.fps, band=tuple(args.band),
+        hash_threshold=args.hash_threshold)
+
+    print(f"采样 {stats['frames']} 帧，空白 {stats['blank_frames']} 帧，"
+          f"OCR调用 {stats['ocr_calls']} 次，得到 {len(segments)} 条字幕")
+    for segment in segments:
+        print(f"{segment['start']:.2f}s - {segment['end']:.2f}s: {segment['text']}")
+
+    output = Path(args.output) if args.output else Path(args.video).with_suffix('.ocr.json')
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(segments, f, ensure_ascii=False, indent=2)
+    print(f"已保存到 {output}")
+
+    if args.task_id:
+        results = create_annotation_result(segments, to_name=args.to_name)
+        get_client().create_annotation(args.task_id, results)
+        print(f"字幕已作为标注上传到任务 {args.task_id}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+
+# 解码后的像素缓冲区之外，OCR 过程中还会有 PNG 重新编码和 base64 等副本
+DECODE_OVERHEAD = 3
+BYTES_PER_PIXEL = 4
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, cost, retry_after):
+        super().__init__(f'内存预算不足，无法接纳 {cost} 字节的任务')
+        self.cost = cost
+        self.retry_after = retry_after
+
+
+def estimate_image_cost(content_length, width, height):
+    """
+    根据下载大小和图片头中的尺寸估算处理一张图片的内存开销（字节）
+    """
+    return (content_length or 0) + width * height * BYTES_PER_PIXEL * DECODE_OVERHEAD
+
+
+def estimate_ocr_cost(width, height, calls=1):
+    """
+    估算 OCR 后端调用期间的内存开销（字节），每个并发调用各有一份 PNG 编码和 base64 副本
+    """
+    return width * height * BYTES_PER_PIXEL * DECODE_OVERHEAD * calls
+
+
+class MemoryBudget:
+    def __init__(self, budget_bytes, max_wait=5.0, max_waiters=32):
+        """
+        按估算内存开销进行准入控制
+
+        Args:
+            budget_bytes: 同时处理的任务可占用的内存总量
+            max_wait: 预算不足时最长排队等待时间（秒）
+            max_waiters: 最多同时排队的任务数，超过时立即拒绝
+        """
+        self.budget = budget_bytes
+        self.max_wait = max_wait
+        self.max_waiters = max_waiters
+        self.reserved = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._cond = threading.Condition()
+
+    @property
+    def retry_after(self):
+        return max(1, math.ceil(self.max_wait))
+
+    def acquire(self, cost):
+        """
+        预留 cost 字节，预算不足时最多等待 max_wait 秒
+
+        超过总预算的单个任务按总预算计，保证它在空闲时仍能被接纳。
+
+        Returns:
+            int: 实际预留的字节数，释放时需传给 release()
+        """
+        cost = min(cost, self.budget)
+        with self._cond:
+            if self.reserved + cost > self.budget:
+                if self.waiting >= self.max_waiters:
+                    self.rejected += 1
+                    raise AdmissionRejected(cost, self.retry_after)
+                self.waiting += 1
+                deadline = time.monotonic() + self.max_wait
+                try:
+                    while self.reserved + cost > self.budget:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.rejected += 1
+                            raise AdmissionRejected(cost, self.retry_after)
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            self.reserved += cost
+            self.admitted += 1
+            return cost
+
+    def release(self, cost):
+        with self._cond:
+            self.reserved -= cost
+            self._cond.notify_all()
+
+    @contextmanager
+    def reserve(self, cost):
+        cost = self.acquire(cost)
+        try:
+            yield cost
+        finally:
+            self.release(cost)
+
+    def gauges(self):
+        with self._cond:
+            return {
+                'budget': self.budget,
+                'reserved': self.reserved,
+                'available': self.budget - self.reserved,
+                'waiting': self.waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+            }
@@ -0,0 +1,142 @@
+import numpy as np
+
+from .wav import read_wav_info, iter_mono_chunks
+
+
+def frame_energy(audio_file, frame_ms=10, chunk_seconds=60):
+    """
+    计算短时能量（dB）
+
+    按块内存映射WAV，每块内一次性向量化计算所有帧的能量，
+    内存占用只与块大小有关，与音频时长无关。
+
+    Args:
+        audio_file: WAV文件路径
+        frame_ms: 帧长（毫秒）
+        chunk_seconds: 每块读取的时长（秒）
+
+    Returns:
+        tuple: (每帧能量的 np.ndarray, 帧长秒数)
+    """
+    info = read_wav_info(audio_file)
+    hop = max(1, int(info.sample_rate * frame_ms / 1000))
+    chunk_frames = max(1, int(info.sample_rate * chunk_seconds) // hop) * hop
+
+    energy = np.empty(-(-info.frames // hop), dtype=np.float32)
+    for start, chunk in iter_mono_chunks(audio_file, info, chunk_frames):
+        n = len(chunk) // hop
+        first = start // hop
+        power = np.square(chunk[:n * hop]).reshape(n, hop).mean(axis=1)
+        if len(chunk) % hop:
+            power = np.append(power, np.square(chunk[n * hop:]).mean())
+        energy[first:first + len(power)] = 10 * np.log10(power + 1e-10)
+    return energy, hop / info.sample_rate
+
+
+def _fill_short_runs(mask, value, min_len):
+    """将长度小于 min_len 且取值为 value 的连续段翻转"""
+    if min_len <= 1 or len(mask) == 0:
+        return mask
+    change = np.diff(mask.astype(np.int8)) != 0
+    edges = np.flatnonzero(change) + 1
+    starts = np.concatenate(([0], edges))
+    ends = np.concatenate((edges, [len(mask)]))
+    short = (mask[starts] == value) & (ends - starts < min_len)
+    # 首尾的段没有两侧邻居，不做翻转
+    short[0] = short[-1] = False
+    run_id = np.concatenate(([0], np.cumsum(change)))
+    return mask ^ short[run_id]
+
+
+def detect_speech_boundaries(energy, frame_seconds, margin_db=12.0,
+                             min_speech=0.1, min_silence=0.15):
+    """
+    基于能量的简易VAD，返回语音起点和终点
+
+    阈值为能量第10百分位（近似噪声底）加 margin_db。
+
+    Returns:
+        tuple: (onsets, offsets)，均为按时间排序的秒数数组
+    """
+    if len(energy) == 0:
+        return np.empty(0), np.empty(0)
+    threshold = np.percentile(energy, 10) + margin_db
+    speech = energy > threshold
+    speech = _fill_short_runs(speech, False, int(min_silence / frame_seconds))
+    speech = _fill_short_runs(speech, True, int(min_speech / frame_seconds))
+
+    change = np.diff(speech.astype(np.int8))
+    onsets = (np.flatnonzero(change == 1) + 1) * frame_seconds
+    offsets = (np.flatnonzero(change == -1) + 1) * frame_seconds
+    return onsets, offsets
+
+
+def _nearest(points, targets, tolerance):
+    """对每个 target 找到最近的 point，超出容差时返回 target 本身"""
+    if len(points) == 0:
+        return targets
+    if len(points) == 1:
+        nearest = np.full_like(targets, points[0])
+    else:
+        idx = np.clip(np.searchsorted(points, targets), 1, len(points) - 1)
+        left = points[idx - 1]
+        right = points[idx]
+        nearest = np.where(targets - left <= right - targets, left, right)
+    return np.where(np.abs(nearest - targets) <= tolerance, nearest, targets)
+
+
+def snap_to_boundaries(subtitles, onsets, offsets, tolerance=0.3):
+    """
+    将字幕的 start/end 吸附到容差范围内最近的语音起点/终点
+
+    吸附后区间无效（end 不晚于 start）的字幕保持原时间不变。
+    相邻字幕各自吸附后可能交叠，此时后一条的起点不早于前一条吸附后的终点；
+    原本就交叠的字幕（如多人同时说话）不做处理。
+
+    Returns:
+        list: 新的字幕列表，原列表不会被修改
+    """
+    if not subtitles:
+        return []
+    starts = np.array([s['start'] for s in subtitles], dtype=np.float64)
+    ends = np.array([s['end'] for s in subtitles], dtype=np.float64)
+
+    new_starts = _nearest(np.asarray(onsets, dtype=np.float64), starts, tolerance)
+    new_ends = _nearest(np.asarray(offsets, dtype=np.float64), ends, tolerance)
+    valid = new_ends > new_starts
+    new_starts = np.where(valid, new_starts, starts)
+    new_ends = np.where(valid, new_ends, ends)
+
+    order = np.argsort(starts, kind='stable')
+    for prev, cur in zip(order[:-1], order[1:]):
+        if starts[cur] < ends[prev] or new_starts[cur] >= new_ends[prev]:
+            continue
+        boundary = new_ends[prev]
+        if boundary >= new_ends[cur]:
+            # 前一条的终点越过了本条的终点，两条在本条原始起点处分开
+            boundary = starts[cur]
+            new_ends[prev] = boundary
+        new_starts[cur] = boundary
+
+    return [
+        {**subtitle, 'start': round(float(start), 3), 'end': round(float(end), 3)}
+        for subtitle, start, end in zip(subtitles, new_starts, new_ends)
+    ]
+
+
+def snap_subtitles(audio_file, subtitles, tolerance=0.3, frame_ms=10):
+    """
+    根据音频中的语音边界校正字幕时间轴
+
+    Args:
+        audio_file: WAV文件路径
+        subtitles: [{'start', 'end', 'text'}, ...]
+        tolerance: 最大吸附距离（秒）
+        frame_ms: 能量计算的帧长（毫秒）
+
+    Returns:
+        list: 校正后的字幕列表
+    """
+    energy, frame_seconds = frame_energy(audio_file, frame_ms)
+    onsets, offsets = detect_speech_boundaries(energy, frame_seconds)
+    return snap_to_boundaries(subtitles, onsets, offsets, tolerance)
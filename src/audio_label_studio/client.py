@@ -0,0 +1,419 @@
+import asyncio
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# 429/503 表示请求未被处理，任何方法都可以安全重试；
+# 其余5xx只对幂等方法重试，避免重复创建任务
+RETRY_ANY_METHOD = (429, 503)
+RETRY_IDEMPOTENT = (500, 502, 504)
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS')
+
+
+class LabelStudioError(Exception):
+    def __init__(self, method, url, status_code, text):
+        super().__init__(f'{method} {url} 失败: {status_code} {text[:200]}')
+        self.status_code = status_code
+
+
+class ClientStats:
+    """
+    线程安全的调用计数和耗时统计，按接口（路径中的数字替换为 {id}）分组
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.errors = 0
+            self.retries = 0
+            self.latency_total = 0.0
+            self.latency_max = 0.0
+            self.endpoints = {}
+
+    @staticmethod
+    def endpoint(method, path):
+        path = re.sub(r'/\d+', '/{id}', path.split('?', 1)[0])
+        return f'{method} {path}'
+
+    def record(self, method, path, latency, retries, error):
+        key = self.endpoint(method, path)
+        with self._lock:
+            self.calls += 1
+            self.retries += retries
+            self.errors += int(error)
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+            stats = self.endpoints.setdefault(key, {'calls': 0, 'latency': 0.0})
+            stats['calls'] += 1
+            stats['latency'] += latency
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'errors': self.errors,
+                'retries': self.retries,
+                'latency_total': round(self.latency_total, 3),
+                'latency_avg': round(self.latency_total / self.calls, 3) if self.calls else 0.0,
+                'latency_max': round(self.latency_max, 3),
+                'endpoints': {k: dict(v) for k, v in self.endpoints.items()},
+            }
+
+
+def _should_retry(method, status_code):
+    if status_code in RETRY_ANY_METHOD:
+        return True
+    return status_code in RETRY_IDEMPOTENT and method in IDEMPOTENT_METHODS
+
+
+def _retry_delay(attempt, backoff, headers=None, max_delay=30.0):
+    """优先使用 Retry-After，否则指数退避并加随机抖动"""
+    retry_after = (headers or {}).get('Retry-After')
+    if retry_after:
+        try:
+            return min(float(retry_after), max_delay)
+        except ValueError:
+            pass
+    return min(backoff * (2 ** attempt), max_delay) * random.uniform(0.5, 1.0)
+
+
+def _chunks(items, size):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _page_tasks(body):
+    """/api/tasks 在不同版本中返回列表或 {'tasks': [...]}"""
+    if isinstance(body, dict):
+        return body.get('tasks', [])
+    return body
+
+
+def _env_settings():
+    base_url = os.getenv('LABEL_STUDIO_URL', 'http://localhost:8080')
+    token = os.getenv('LABEL_STUDIO_TOKEN') or os.getenv('LABEL_STUDIO_API_TOKEN')
+    return base_url, token
+
+
+class LabelStudioClient:
+    def __init__(self, base_url, token, pool_size=10, max_retries=5,
+                 backoff=0.5, timeout=30):
+        """
+        带连接池和重试的 Label Studio 同步客户端
+
+        Args:
+            base_url: Label Studio 地址，例如 http://localhost:8080
+            token: API Token
+            pool_size: 连接池大小，同时也是批量创建标注时的并发数
+            max_retries: 429/5xx 的最大重试次数
+            backoff: 指数退避的基础时长（秒）
+            timeout: 单次请求超时（秒）
+        """
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.stats = ClientStats()
+
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f'Token {token}'
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method, path, **kwargs):
+        """
+        发送请求，遇到 429/5xx 时按退避策略重试
+
+        Returns:
+            requests.Response
+        """
+        method = method.upper()
+        url = f'{self.base_url}{path}'
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.ConnectionError:
+                if method not in IDEMPOTENT_METHODS or attempt >= self.max_retries:
+                    self.stats.record(method, path, time.perf_counter() - start, attempt, True)
+                    raise
+                time.sleep(_retry_delay(attempt, self.backoff))
+                attempt += 1
+                continue
+            if _should_retry(method, response.status_code) and attempt < self.max_retries:
+                time.sleep(_retry_delay(attempt, self.backoff, response.headers))
+                attempt += 1
+                continue
+            break
+
+        error = response.status_code >= 400
+        self.stats.record(method, path, time.perf_counter() - start, attempt, error)
+        if error:
+            raise LabelStudioError(method, url, response.status_code, response.text)
+        return response
+
+    def get_json(self, path, **kwargs):
+        return self.request('GET', path, **kwargs).json()
+
+    def post_json(self, path, payload, **kwargs):
+        return self.request('POST', path, json=payload, **kwargs).json()
+
+    def patch_json(self, path, payload, **kwargs):
+        return self.request('PATCH', path, json=payload, **kwargs).json()
+
+    def download(self, path):
+        """下载 Label Studio 上的文件（如 /data/local-files/?d=...），返回字节内容"""
+        return self.request('GET', path).content
+
+    def create_task(self, project_id, data):
+        return self.post_json('/api/tasks/', {'project': project_id, 'data': data})
+
+    def create_annotation(self, task_id, result, **fields):
+        return self.post_json(f'/api/tasks/{task_id}/annotations/', {'result': result, **fields})
+
+    def update_task(self, task_id, data):
+        return self.patch_json(f'/api/tasks/{task_id}/', {'data': data})
+
+    def update_annotation(self, annotation_id, result, **fields):
+        return self.patch_json(f'/api/annotations/{annotation_id}/', {'result': result, **fields})
+
+    def import_tasks(self, project_id, tasks, chunk_size=500):
+        """
+        分块批量导入任务
+
+        Args:
+            project_id: 项目ID
+            tasks: 任务列表，每项为 {'data': {...}} 或直接为 data 字典
+            chunk_size: 每次请求导入的任务数
+
+        Returns:
+            list: 按输入顺序排列的任务ID
+        """
+        task_ids = []
+        for chunk in _chunks(tasks, chunk_size):
+            body = self.post_json(f'/api/projects/{project_id}/import?return_task_ids=true', chunk)
+            task_ids.extend(body.get('task_ids', []))
+        return task_ids
+
+    def import_predictions(self, project_id, predictions, chunk_size=500):
+        """
+        分块批量导入预测，每项为 {'task': task_id, 'result': [...], 'score': ..., 'model_version': ...}
+
+        Returns:
+            int: 导入的预测数量
+        """
+        count = 0
+        for chunk in _chunks(predictions, chunk_size):
+            body = self.post_json(f'/api/projects/{project_id}/import/predictions', chunk)
+            count += body.get('created', len(chunk)) if isinstance(body, dict) else len(chunk)
+        return count
+
+    def create_annotations(self, items, chunk_size=100):
+        """
+        批量创建标注。Label Studio 没有批量标注接口，因此在连接池上并发发送，
+        每块最多 chunk_size 个请求
+
+        Args:
+            items: [(task_id, result), ...]
+
+        Returns:
+            list: 按输入顺序排列的标注
+        """
+        annotations = []
+        with ThreadPoolExecutor(max_workers=self.pool_size) as executor:
+            for chunk in _chunks(items, chunk_size):
+                annotations.extend(executor.map(
+                    lambda item: self.create_annotation(*item), chunk))
+        return annotations
+
+    def iter_tasks(self, project_id, page_size=100, **params):
+        """
+        分页遍历项目中的任务
+
+        Yields:
+            dict: 任务
+        """
+        page = 1
+        while True:
+            try:
+                body = self.get_json('/api/tasks/', params={
+                    'project': project_id, 'page': page, 'page_size': page_size, **params})
+            except LabelStudioError as e:
+                # 超出最后一页时返回404
+                if e.status_code == 404:
+                    return
+                raise
+            tasks = _page_tasks(body)
+            yield from tasks
+            if len(tasks) < page_size:
+                return
+            page += 1
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncLabelStudioClient:
+    def __init__(self, base_url, token, pool_size=10, max_retries=5,
+                 backoff=0.5, timeout=30):
+        """
+        带连接池和重试的 Label Studio 异步客户端，参数与 LabelStudioClient 相同
+        """
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.stats = ClientStats()
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={'Authorization': f'Token {token}'},
+            limits=httpx.Limits(max_connections=pool_size,
+                                max_keepalive_connections=pool_size),
+            timeout=timeout,
+        )
+
+    async def request(self, method, path, **kwargs):
+        method = method.upper()
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                response = await self.client.request(method, path, **kwargs)
+            except httpx.TransportError:
+                if method not in IDEMPOTENT_METHODS or attempt >= self.max_retries:
+                    self.stats.record(method, path, time.perf_counter() - start, attempt, True)
+                    raise
+                await asyncio.sleep(_retry_delay(attempt, self.backoff))
+                attempt += 1
+                continue
+            if _should_retry(method, response.status_code) and attempt < self.max_retries:
+                await asyncio.sleep(_retry_delay(attempt, self.backoff, response.headers))
+                attempt += 1
+                continue
+            break
+
+        error = response.status_code >= 400
+        self.stats.record(method, path, time.perf_counter() - start, attempt, error)
+        if error:
+            raise LabelStudioError(method, f'{self.base_url}{path}',
+                                   response.status_code, response.text)
+        return response
+
+    async def get_json(self, path, **kwargs):
+        return (await self.request('GET', path, **kwargs)).json()
+
+    async def post_json(self, path, payload, **kwargs):
+        return (await self.request('POST', path, json=payload, **kwargs)).json()
+
+    async def patch_json(self, path, payload, **kwargs):
+        return (await self.request('PATCH', path, json=payload, **kwargs)).json()
+
+    async def download(self, path):
+        return (await self.request('GET', path)).content
+
+    async def create_task(self, project_id, data):
+        return await self.post_json('/api/tasks/', {'project': project_id, 'data': data})
+
+    async def create_annotation(self, task_id, result, **fields):
+        return await self.post_json(f'/api/tasks/{task_id}/annotations/', {'result': result, **fields})
+
+    async def update_task(self, task_id, data):
+        return await self.patch_json(f'/api/tasks/{task_id}/', {'data': data})
+
+    async def update_annotation(self, annotation_id, result, **fields):
+        return await self.patch_json(f'/api/annotations/{annotation_id}/', {'result': result, **fields})
+
+    async def import_tasks(self, project_id, tasks, chunk_size=500):
+        task_ids = []
+        for chunk in _chunks(tasks, chunk_size):
+            body = await self.post_json(
+                f'/api/projects/{project_id}/import?return_task_ids=true', chunk)
+            task_ids.extend(body.get('task_ids', []))
+        return task_ids
+
+    async def import_predictions(self, project_id, predictions, chunk_size=500):
+        count = 0
+        for chunk in _chunks(predictions, chunk_size):
+            body = await self.post_json(f'/api/projects/{project_id}/import/predictions', chunk)
+            count += body.get('created', len(chunk)) if isinstance(body, dict) else len(chunk)
+        return count
+
+    async def create_annotations(self, items, chunk_size=100):
+        semaphore = asyncio.Semaphore(self.pool_size)
+
+        async def create(task_id, result):
+            async with semaphore:
+                return await self.create_annotation(task_id, result)
+
+        annotations = []
+        for chunk in _chunks(items, chunk_size):
+            annotations.extend(await asyncio.gather(*(create(*item) for item in chunk)))
+        return annotations
+
+    async def iter_tasks(self, project_id, page_size=100, **params):
+        page = 1
+        while True:
+            try:
+                body = await self.get_json('/api/tasks/', params={
+                    'project': project_id, 'page': page, 'page_size': page_size, **params})
+            except LabelStudioError as e:
+                if e.status_code == 404:
+                    return
+                raise
+            tasks = _page_tasks(body)
+            for task in tasks:
+                yield task
+            if len(tasks) < page_size:
+                return
+            page += 1
+
+    async def close(self):
+        await self.client.aclose()
+
+
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+
+def get_client(**kwargs):
+    """
+    返回进程内共享的同步客户端，首次调用时从环境变量读取配置
+
+    环境变量: LABEL_STUDIO_URL, LABEL_STUDIO_TOKEN（或 LABEL_STUDIO_API_TOKEN）
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            base_url, token = _env_settings()
+            _client = LabelStudioClient(base_url, token, **kwargs)
+    return _client
+
+
+def get_async_client(**kwargs):
+    """
+    返回进程内共享的异步客户端，配置方式与 get_client() 相同
+    """
+    global _async_client
+    with _client_lock:
+        if _async_client is None:
+            base_url, token = _env_settings()
+            _async_client = AsyncLabelStudioClient(base_url, token, **kwargs)
+    return _async_client
@@ -0,0 +1,79 @@
+import subprocess
+from pathlib import Path
+
+from .probe import probe, subtitle_tracks
+
+
+# 支持的视频格式
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.wmv')
+
+# 支持的音频格式及其对应的编码器
+AUDIO_CODECS = {
+    'wav': 'pcm_s16le',  # WAV格式使用PCM编码
+    'mp3': 'libmp3lame',  # MP3格式
+    'aac': 'aac',        # AAC格式
+    'flac': 'flac'       # FLAC格式
+}
+
+
+def extract_audio_file(input_path, output_path, output_format='wav'):
+    """
+    使用ffmpeg从单个视频文件中提取音频
+
+    Args:
+        input_path: 输入视频文件
+        output_path: 输出音频文件
+        output_format: 输出音频格式（默认为wav）
+    """
+    if output_format not in AUDIO_CODECS:
+        raise ValueError(
+            f'不支持的音频格式: {output_format}。支持的格式: {", ".join(AUDIO_CODECS.keys())}')
+
+    # 构建ffmpeg命令
+    command = [
+        'ffmpeg',
+        '-i', str(input_path),
+        '-vn',  # 不处理视频
+        '-acodec', AUDIO_CODECS[output_format],  # 使用指定的音频编码器
+        '-y',  # 覆盖已存在的文件
+    ]
+
+    # 为MP3格式添加质量参数
+    if output_format == 'mp3':
+        command.extend(['-q:a', '2'])  # 设置音频质量（2是较高质量）
+
+    command.append(str(output_path))
+    subprocess.run(command, check=True, capture_output=True)
+
+
+def subtitle_output_paths(mkv_path, output_dir):
+    """
+    返回MKV文件中每个字幕轨道的 (track_id, 输出路径)
+    """
+    mkv_path = Path(mkv_path)
+    output_dir = Path(output_dir)
+    outputs = []
+    for track, lang in subtitle_tracks(probe(mkv_path)):
+        output_name = f"{mkv_path.stem}_sub{track}_{lang}.sub"
+        outputs.append((track, output_dir / output_name))
+    return outputs
+
+
+def extract_subtitle_tracks(mkv_path, output_dir):
+    """
+    使用一次mkvextract调用提取MKV文件中的全部字幕轨道
+
+    Returns:
+        list: 提取出的字幕文件路径，没有字幕轨道时为空列表
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    outputs = subtitle_output_paths(mkv_path, output_dir)
+    if not outputs:
+        return []
+
+    command = ['mkvextract', 'tracks', str(mkv_path)]
+    command.extend(f"{track}:{output_path}" for track, output_path in outputs)
+    subprocess.run(command, check=True, capture_output=True)
+    return [output_path for _, output_path in outputs]
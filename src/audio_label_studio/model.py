@@ -1,7 +1,13 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
 from PIL import Image
 import pytesseract
 
 from .huoshan.ocr import predict as huoshan_predict
+from .profiling import submit_profiled
 
 
 class OCRModel:
@@ -86,3 +92,134 @@ class HuoshanOCRModel(OCRModel):
             h = result['rect'][2][1] - y
             ocr_results.append((text, (x, y, w, h)))
         return ocr_results
+
+
+class HedgedOCRModel(OCRModel):
+    def __init__(self, primary: OCRModel, secondary: OCRModel, deadline=1.0,
+                 timeout=30.0, accept=None, max_workers=8):
+        """
+        带对冲请求的组合 OCR 模型
+
+        先请求主模型，若超过 deadline 仍未返回或出错，则同时请求备用模型，
+        返回最先得到的可接受结果，另一个请求的结果被忽略。
+
+        Args:
+            primary: 主模型
+            secondary: 备用模型
+            deadline: 启动备用模型前等待主模型的时间（秒）
+            timeout: 整体等待的最长时间（秒）
+            accept: accept(results) -> bool，判断结果是否可接受，默认非空即可接受
+            max_workers: 每个模型的后台线程数
+
+        主模型和备用模型各用一个线程池：主模型变慢时其线程池会被占满，
+        若共用线程池，备用请求会排在慢请求之后，对冲就失去了意义。
+        """
+        super().__init__()
+        self.primary = primary
+        self.secondary = secondary
+        self.deadline = deadline
+        self.timeout = timeout
+        self.accept = accept or (lambda results: bool(results))
+        self.primary_executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='ocr-primary')
+        self.secondary_executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='ocr-secondary')
+        self.wins = Counter()
+        self.hedged = 0
+        self.last_winner = None
+        self._lock = threading.Lock()
+
+    def _record(self, winner, hedged):
+        with self._lock:
+            self.wins[winner] += 1
+            self.hedged += int(hedged)
+            self.last_winner = winner
+
+    def stats(self):
+        with self._lock:
+            return {
+                'wins': dict(self.wins),
+                'hedged': self.hedged,
+                'last_winner': self.last_winner,
+            }
+
+    @staticmethod
+    def _notify_when_settled(futures, callback):
+        """所有 future 结束（完成、出错或被取消）后调用一次 callback"""
+        if not futures:
+            callback()
+            return
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def done(_):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                callback()
+
+        for future in futures:
+            future.add_done_callback(done)
+
+    def predict(self, image: Image.Image, on_settled=None):
+        """
+        Args:
+            image: 待识别的图片
+            on_settled: 所有已启动的后端调用都结束后调用（包括返回后仍在运行的落败调用），
+                用于释放这些调用期间占用的资源
+
+        Returns:
+            list: [(text, (x, y, width, height)), ...]，两个模型都没有可接受结果时
+            返回最后一个正常返回的结果，都出错时抛出最后一个异常
+        """
+        names = {}
+        try:
+            # 两个线程会同时读取图片，提前完成懒加载
+            image.load()
+            start = time.monotonic()
+
+            primary = submit_profiled(self.primary_executor, self.primary.predict, image)
+            names[primary] = type(self.primary).__name__
+            pending = {primary}
+            done, _ = wait(pending, timeout=self.deadline)
+
+            hedged = False
+            fallback = None
+            error = None
+            while True:
+                for future in done:
+                    pending.discard(future)
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        error = e
+                        continue
+                    if self.accept(results):
+                        for other in pending:
+                            other.cancel()
+                        self._record(names[future], hedged)
+                        return results
+                    fallback = results
+
+                if not hedged:
+                    # 主模型超时、出错或结果不可接受，启动备用模型
+                    hedged = True
+                    secondary = submit_profiled(self.secondary_executor, self.secondary.predict, image)
+                    names[secondary] = type(self.secondary).__name__
+                    pending.add(secondary)
+
+                remaining = self.timeout - (time.monotonic() - start)
+                if not pending or remaining <= 0:
+                    break
+                done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+
+            if fallback is not None:
+                self._record('none', hedged)
+                return fallback
+            if error is not None:
+                raise error
+            raise TimeoutError(f'OCR 在 {self.timeout} 秒内没有返回结果')
+        finally:
+            if on_settled is not None:
+                self._notify_when_settled(list(names), on_settled)
@@ -1,30 +1,128 @@
 from fastapi.routing import APIRouter
-from fastapi import Request
+from fastapi import Request, Header, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from typing import List
+from contextlib import contextmanager
 from PIL import Image
 import io
 import uuid
 import json
-import requests
-from .model import HuoshanOCRModel
 import os
+import secrets
+from .model import HuoshanOCRModel, TesseractOCRModel, HedgedOCRModel
+from .client import get_client, LabelStudioError
+from .admission import MemoryBudget, AdmissionRejected, estimate_image_cost, estimate_ocr_cost
+from .profiling import ProfileController
 
 router = APIRouter(prefix="/ocr")
 ocr_model = HuoshanOCRModel()
 
 
-def download_image(task: dict):
+def build_detect_model():
+    """
+    交互式 auto_detect 使用的模型：火山引擎超过 OCR_HEDGE_DEADLINE 秒未返回时，
+    同时用本地 Tesseract 识别，取先返回的结果
+    """
+    try:
+        fallback = TesseractOCRModel()
+    except Exception:
+        print("[WARN] Tesseract 不可用，auto_detect 只使用主模型")
+        return ocr_model
+    return HedgedOCRModel(
+        ocr_model, fallback,
+        deadline=float(os.getenv("OCR_HEDGE_DEADLINE", "1.5")),
+        timeout=float(os.getenv("OCR_HEDGE_TIMEOUT", "30")),
+    )
+
+
+detect_model = build_detect_model()
+
+
+memory_budget = MemoryBudget(
+    int(float(os.getenv("OCR_MEMORY_BUDGET_MB", "1024")) * 1024 * 1024),
+    max_wait=float(os.getenv("OCR_ADMISSION_WAIT", "5")),
+    max_waiters=int(os.getenv("OCR_ADMISSION_QUEUE", "32")),
+)
+
+profiler = ProfileController()
+
+# 读取图片头时最多预读的字节数
+HEADER_PROBE_LIMIT = 1024 * 1024
+
+
+def probe_image_size(head: bytes):
+    """
+    从图片开头的字节中读取尺寸，数据不足以解析文件头时返回 None
+
+    Image.open 只解析文件头，不会分配像素缓冲区；ImageFile.Parser 对 BMP、GIF、TIFF
+    等格式在识别文件头后就会分配整张图片，不能在预留内存预算之前使用。
+    """
+    try:
+        with Image.open(io.BytesIO(head)) as image:
+            return image.size
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+
+@contextmanager
+def open_task_image(task: dict, extra_cost=None):
+    """
+    下载任务图片并在处理期间占用内存预算
+
+    先只读取图片头获得尺寸，结合 Content-Length 估算内存开销，
+    预留成功后才读取剩余内容并解码。预算不足时抛出 AdmissionRejected。
+
+    Args:
+        task: Label Studio 任务
+        extra_cost: extra_cost(width, height) -> int，与图片一起预留的额外开销（字节），
+            用于离开 with 块后仍可能在后台运行的调用
+
+    Yields:
+        tuple: (PIL.Image.Image 或 None, defer_release)。图片的预留在离开 with 块时释放；
+        调用 defer_release() 后额外预留的部分改为由其返回的函数释放，否则同样在离开时释放
+    """
     image_url = task["data"].get("ocr")
     if not image_url:
-        return None
-    image_url = f"http://localhost:8080{image_url}"
-    headers = {
-        "Authorization": f"Token {os.getenv('LABEL_STUDIO_API_TOKEN')}"
-    }
-    response = requests.get(image_url, headers=headers)
-    if response.status_code != 200:
-        return None
-    return response.content
+        yield None, None
+        return
+    try:
+        response = get_client().request("GET", image_url, stream=True)
+    except LabelStudioError:
+        yield None, None
+        return
+
+    with response:
+        content_length = int(response.headers.get("Content-Length") or 0)
+        chunks = response.iter_content(64 * 1024)
+        head = b""
+        size = None
+        for chunk in chunks:
+            head += chunk
+            size = probe_image_size(head)
+            if size or len(head) >= HEADER_PROBE_LIMIT:
+                break
+        if size is None:
+            yield None, None
+            return
+
+        width, height = size
+        cost = estimate_image_cost(content_length or len(head), width, height)
+        extra = extra_cost(width, height) if extra_cost else 0
+        # 一次性预留，避免持有图片预算时再排队等待额外预算
+        reserved = memory_budget.acquire(cost + extra)
+        extra = min(extra, reserved)
+        deferred = []
+
+        def defer_release():
+            deferred[:] = [extra]
+            return lambda: memory_budget.release(extra)
+
+        try:
+            content = head + b"".join(chunks)
+            yield Image.open(io.BytesIO(content)), defer_release
+        finally:
+            memory_budget.release(reserved - sum(deferred))
 
 
 def process_ocr_results(ocr_results, img_width: int, img_height: int):
@@ -85,20 +183,13 @@ def process_ocr_results(ocr_results, img_width: int, img_height: int):
     return result
 
 
-def download_as_image_object(task: dict):
-    image_content = download_image(task)
-    if not image_content:
-        return None
-    return Image.open(io.BytesIO(image_content))
-
-
 def prelabeling(task: dict):
-    img = download_as_image_object(task)
-    if not img:
-        return {"result": [], "score": 0.0}
+    with open_task_image(task) as (img, _):
+        if not img:
+            return {"result": [], "score": 0.0}
 
-    img_width, img_height = img.size
-    ocr_results = ocr_model.predict(img)
+        img_width, img_height = img.size
+        ocr_results = ocr_model.predict(img)
     result = process_ocr_results(ocr_results, img_width, img_height)
     return {
         "result": result,
@@ -148,22 +239,40 @@ def process_ocr_detect_result(ocr_result: list, bbox_label: dict):
     return result
 
 
-def auto_detect(task: dict, bbox_label: dict):
-    img = download_as_image_object(task)
-    if not img:
-        return {"result": [], "score": 0.0}
-
-    img_width, img_height = img.size
-
-    x = bbox_label['value']['x'] / 100 * img_width
-    y = bbox_label['value']['y'] / 100 * img_height
-    w = bbox_label['value']['width'] / 100 * img_width
-    h = bbox_label['value']['height'] / 100 * img_height
+def hedge_working_set(bbox_label: dict):
+    """
+    对冲OCR的两个后端各自持有裁剪区域的 PNG 和 base64 副本，
+    且落败的调用在 predict 返回后仍会继续运行，这部分开销需要单独预留
+    """
+    def cost(width, height):
+        w = bbox_label['value']['width'] / 100 * width
+        h = bbox_label['value']['height'] / 100 * height
+        return estimate_ocr_cost(int(w), int(h), calls=2)
+    return cost
 
-    print(x, y, w, h)
-    img_crop = img.crop((int(x), int(y), int(x + w), int(y + h)))
 
-    ocr_results = ocr_model.predict(img_crop)
+def auto_detect(task: dict, bbox_label: dict):
+    hedged = isinstance(detect_model, HedgedOCRModel)
+    extra_cost = hedge_working_set(bbox_label) if hedged else None
+    with open_task_image(task, extra_cost) as (img, defer_release):
+        if not img:
+            return {"result": [], "score": 0.0}
+
+        img_width, img_height = img.size
+
+        x = bbox_label['value']['x'] / 100 * img_width
+        y = bbox_label['value']['y'] / 100 * img_height
+        w = bbox_label['value']['width'] / 100 * img_width
+        h = bbox_label['value']['height'] / 100 * img_height
+
+        print(x, y, w, h)
+        img_crop = img.crop((int(x), int(y), int(x + w), int(y + h)))
+
+        if hedged:
+            # 对冲调用的预算在两个后端都结束后才释放
+            ocr_results = detect_model.predict(img_crop, on_settled=defer_release())
+        else:
+            ocr_results = detect_model.predict(img_crop)
     result = process_ocr_detect_result(ocr_results, bbox_label)
 
     return {
@@ -174,29 +283,39 @@ def auto_detect(task: dict, bbox_label: dict):
 
 def handle_tasks(tasks: List[dict]):
     results = []
-    for task in tasks:
-        results.append(prelabeling(task))
+    with profiler.request("prelabeling"):
+        for task in tasks:
+            results.append(prelabeling(task))
     return results
 
 
 def handle_detect(tasks: List[dict], bbox_label: dict):
     results = []
-    for task in tasks:
-        results.append(auto_detect(task, bbox_label))
+    with profiler.request("auto_detect"):
+        for task in tasks:
+            results.append(auto_detect(task, bbox_label))
     return results
 
 
 @router.post("/predict")
 async def predict(request: Request):
     data: dict = await request.json()
-    if "params" not in data or data['params']['context'] is None:
-        tasks: List[dict] = data["tasks"]
-        results = handle_tasks(tasks)
-    else:
-        tasks: List[dict] = data["tasks"]
-        bbox_labels: List[dict] = data['params']['context']['result'][0]
-        print(bbox_labels)
-        results = handle_detect(tasks, bbox_labels)
+    try:
+        # 在线程池中处理，排队等待内存预算时不阻塞事件循环
+        if "params" not in data or data['params']['context'] is None:
+            tasks: List[dict] = data["tasks"]
+            results = await run_in_threadpool(handle_tasks, tasks)
+        else:
+            tasks: List[dict] = data["tasks"]
+            bbox_labels: List[dict] = data['params']['context']['result'][0]
+            print(bbox_labels)
+            results = await run_in_threadpool(handle_detect, tasks, bbox_labels)
+    except AdmissionRejected as e:
+        return JSONResponse(
+            status_code=503,
+            content={"error": str(e)},
+            headers={"Retry-After": str(e.retry_after)},
+        )
     return {
         "results": results
     }
@@ -207,6 +326,54 @@ async def health():
     return {"status": "ok"}
 
 
+@router.get("/stats")
+async def stats():
+    result = {"memory": memory_budget.gauges()}
+    if isinstance(detect_model, HedgedOCRModel):
+        result["hedge"] = detect_model.stats()
+    return result
+
+
+def require_admin(x_admin_token: str = Header(None)):
+    """管理接口需要请求头 X-Admin-Token 与环境变量 OCR_ADMIN_TOKEN 一致，未配置时关闭"""
+    expected = os.getenv("OCR_ADMIN_TOKEN")
+    if not expected or not x_admin_token \
+            or not secrets.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=403, detail="forbidden")
+
+
+@router.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def start_profile(request: Request):
+    """
+    开启性能分析：
+        {"requests": N, "mode": "cprofile" | "sampling"} 分析接下来的 N 个请求
+        {"seconds": S} 对整个进程采样 S 秒
+    """
+    data: dict = await request.json()
+    try:
+        if "seconds" in data:
+            profiler.profile_window(float(data["seconds"]))
+        else:
+            profiler.profile_requests(int(data.get("requests", 1)),
+                                      data.get("mode", "cprofile"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return profiler.status()
+
+
+@router.get("/admin/profile", dependencies=[Depends(require_admin)])
+async def profile_status():
+    return profiler.status()
+
+
+@router.delete("/admin/profile", dependencies=[Depends(require_admin)])
+async def cancel_profile():
+    profiler.cancel()
+    return profiler.status()
+
+
 @router.post("/setup")
 async def setup():
     return {"status": "ok", "model_version": "1.0.0"}
@@ -0,0 +1,376 @@
+import hashlib
+import json
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+
+from .align import snap_subtitles
+from .client import LabelStudioError
+from .extract import VIDEO_EXTENSIONS, extract_audio_file, extract_subtitle_tracks
+from .subtitle import read_subtitle_file, create_annotation_result
+from .tasks import get_audio_task_data
+from .waveform import proxy_paths, make_proxy, write_peaks
+
+
+class PipelineConfig:
+    def __init__(self, audio_dir, subtitle_dir, state_dir, proxy_dir=None,
+                 proxy_format='opus', project_id=None, language=None,
+                 snap_tolerance=None, client=None):
+        """
+        流水线配置
+
+        Args:
+            audio_dir: 音频输出目录
+            subtitle_dir: 字幕输出目录
+            state_dir: 流水线状态（每个视频一个JSON清单）的保存目录
+            proxy_dir: 代理音频和波形峰值的输出目录，为 None 时跳过该步骤
+            proxy_format: 代理音频格式
+            project_id: Label Studio项目ID，为 None 时不导入任务
+            language: 导入时使用的字幕语言代码
+            snap_tolerance: 字幕边界吸附容差（秒），为 None 时不吸附
+            client: LabelStudioClient，导入任务时使用
+        """
+        self.audio_dir = Path(audio_dir)
+        self.subtitle_dir = Path(subtitle_dir)
+        self.state_dir = Path(state_dir)
+        self.proxy_dir = Path(proxy_dir) if proxy_dir else None
+        self.proxy_format = proxy_format
+        self.project_id = project_id
+        self.language = language
+        self.snap_tolerance = snap_tolerance
+        self.client = client
+
+
+class Step:
+    def __init__(self, name, run, inputs, deps=(), params=None):
+        """
+        流水线中的一个步骤
+
+        Args:
+            name: 步骤名
+            run: run(job, inputs) -> (输出文件列表, 附加结果)
+            inputs: inputs(job) -> 输入文件列表，用于计算内容指纹
+            deps: 依赖的步骤名
+            params: 影响输出的参数，参与指纹计算
+        """
+        self.name = name
+        self.run = run
+        self.inputs = inputs
+        self.deps = tuple(deps)
+        self.params = params or {}
+
+
+def file_digest(path, block_size=1024 * 1024):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def job_name(video, input_dir=None):
+    """
+    视频的输出名：相对 input_dir 的路径去掉扩展名
+
+    输出文件和清单按该名字放在对应的子目录下，
+    不同子目录中的同名视频（如 a/ep1.mkv 和 b/ep1.mkv）不会互相覆盖
+    """
+    video = Path(video)
+    if input_dir is None:
+        return Path(video.stem)
+    return video.relative_to(input_dir).parent / video.stem
+
+
+class VideoJob:
+    def __init__(self, video, config: PipelineConfig, name=None):
+        self.video = Path(video)
+        self.config = config
+        self.name = Path(name) if name else Path(self.video.stem)
+        self.state_path = self.output_dir(config.state_dir) / f'{self.name.name}.json'
+        self.lock = threading.Lock()
+        self.state = self._load_state()
+        # 本次运行中各步骤的状态: running / done / skipped / failed / blocked
+        self.status = {}
+
+    def _load_state(self):
+        if self.state_path.exists():
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {'video': str(self.video), 'files': {}, 'steps': {}}
+
+    def save(self):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix('.tmp')
+        # 步骤执行中也可能保存，写入和替换都在锁内完成
+        with self.lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, ensure_ascii=False, indent=2)
+            tmp_path.replace(self.state_path)
+
+    def fingerprint(self, path):
+        """
+        文件内容指纹，按 (大小, 修改时间) 缓存在清单中，未变化的文件不会重新计算哈希
+        """
+        path = Path(path)
+        stat = path.stat()
+        key = str(path.resolve())
+        with self.lock:
+            cached = self.state['files'].get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = file_digest(path)
+        with self.lock:
+            self.state['files'][key] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def output_dir(self, base_dir):
+        return Path(base_dir) / self.name.parent
+
+    def outputs(self, step_name):
+        with self.lock:
+            return [Path(p) for p in self.state['steps'].get(step_name, {}).get('outputs', [])]
+
+    def result(self, step_name):
+        """上一次执行该步骤时记录的附加结果"""
+        with self.lock:
+            return self.state['steps'].get(step_name, {}).get('result')
+
+    def record_result(self, step_name, result):
+        """
+        在步骤执行过程中立即保存附加结果，步骤随后失败时也不会丢失
+        （如已在 Label Studio 中创建的任务ID）。记录不含指纹，步骤完成前不会被视为最新
+        """
+        with self.lock:
+            self.state['steps'][step_name] = {'result': result}
+        self.save()
+
+    def step_fingerprint(self, step: Step):
+        inputs = sorted(str(p) for p in step.inputs(self))
+        payload = {
+            'step': step.name,
+            'params': step.params,
+            'inputs': [(p, self.fingerprint(p)) for p in inputs],
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def is_fresh(self, step: Step, fingerprint):
+        with self.lock:
+            record = self.state['steps'].get(step.name)
+        if not record or record.get('fingerprint') != fingerprint:
+            return False
+        for path, digest in record.get('output_digests', {}).items():
+            if not Path(path).exists() or self.fingerprint(path) != digest:
+                return False
+        return True
+
+    def execute(self, step: Step):
+        """
+        执行步骤，输入指纹未变且输出完好时跳过
+
+        Returns:
+            bool: 是否实际执行
+        """
+        fingerprint = self.step_fingerprint(step)
+        if self.is_fresh(step, fingerprint):
+            return False
+
+        outputs, result = step.run(self, step.inputs(self))
+        record = {
+            'fingerprint': fingerprint,
+            'outputs': [str(p) for p in outputs],
+            'output_digests': {str(p): self.fingerprint(p) for p in outputs},
+            'result': result,
+        }
+        with self.lock:
+            self.state['steps'][step.name] = record
+        return True
+
+
+def _audio_path(job: VideoJob):
+    return job.output_dir(job.config.audio_dir) / f'{job.name.name}.wav'
+
+
+def _run_audio(job: VideoJob, inputs):
+    output_path = _audio_path(job)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    extract_audio_file(job.video, output_path, 'wav')
+    return [output_path], None
+
+
+def _run_subtitles(job: VideoJob, inputs):
+    if job.video.suffix.lower() != '.mkv':
+        return [], None
+    return extract_subtitle_tracks(job.video, job.output_dir(job.config.subtitle_dir)), None
+
+
+def _run_proxy(job: VideoJob, inputs):
+    config = job.config
+    audio_file = _audio_path(job)
+    proxy_dir = job.output_dir(config.proxy_dir)
+    proxy_dir.mkdir(parents=True, exist_ok=True)
+    proxy_path, peaks_path = proxy_paths(audio_file, proxy_dir, config.proxy_format)
+    make_proxy(audio_file, proxy_path, config.proxy_format)
+    write_peaks(audio_file, peaks_path)
+    return [proxy_path, peaks_path], None
+
+
+def _upsert_task(client, project_id, task_id, task_data):
+    if task_id is not None:
+        try:
+            client.update_task(task_id, task_data)
+            return task_id
+        except LabelStudioError as e:
+            # 任务已在 Label Studio 中被删除，重新创建
+            if e.status_code != 404:
+                raise
+    return client.create_task(project_id, task_data)['id']
+
+
+def _upsert_annotation(client, task_id, annotation_id, results):
+    if annotation_id is not None:
+        try:
+            client.update_annotation(annotation_id, results)
+            return annotation_id
+        except LabelStudioError as e:
+            if e.status_code != 404:
+                raise
+    return client.create_annotation(task_id, results)['id']
+
+
+def _run_import(job: VideoJob, inputs):
+    """
+    导入任务和字幕标注
+
+    重新导入时更新上次创建的任务和标注，而不是重复创建
+    """
+    config = job.config
+    audio_file = _audio_path(job)
+    previous = job.result('import') or {}
+
+    subtitles = []
+    for sub_file in job.outputs('subtitles'):
+        subtitles = read_subtitle_file(sub_file, config.language)
+        if subtitles:
+            break
+    if subtitles and config.snap_tolerance is not None:
+        subtitles = snap_subtitles(audio_file, subtitles, config.snap_tolerance)
+
+    proxy_dir = job.output_dir(config.proxy_dir) if config.proxy_dir else None
+    task_data = get_audio_task_data(audio_file, proxy_dir, config.proxy_format)
+    task_id = _upsert_task(config.client, config.project_id, previous.get('task_id'), task_data)
+    # 任务被重新创建时，旧的标注ID不再有效
+    annotation_id = previous.get('annotation_id') if task_id == previous.get('task_id') else None
+    # 先保存任务ID，上传标注失败后重新运行时更新该任务而不是再创建一个
+    job.record_result('import', {'task_id': task_id, 'annotation_id': annotation_id})
+
+    results = create_annotation_result(subtitles)
+    if results:
+        annotation_id = _upsert_annotation(config.client, task_id, annotation_id, results)
+    return [], {'task_id': task_id, 'annotation_id': annotation_id, 'annotations': len(results)}
+
+
+def build_steps(config: PipelineConfig):
+    """
+    构造每个视频的步骤依赖图：
+
+        audio ──┬── proxy ──┐
+                └───────────┼── import
+        subtitles ──────────┘
+    """
+    steps = [
+        Step('audio', _run_audio, lambda job: [job.video],
+             params={'audio_dir': str(config.audio_dir)}),
+        Step('subtitles', _run_subtitles, lambda job: [job.video],
+             params={'subtitle_dir': str(config.subtitle_dir)}),
+    ]
+    import_deps = ['audio', 'subtitles']
+    if config.proxy_dir is not None:
+        steps.append(Step('proxy', _run_proxy, lambda job: job.outputs('audio'),
+                          deps=['audio'], params={'proxy_dir': str(config.proxy_dir),
+                                                  'format': config.proxy_format}))
+        import_deps.append('proxy')
+    if config.project_id is not None:
+        steps.append(Step(
+            'import', _run_import,
+            lambda job: [p for dep in import_deps for p in job.outputs(dep)],
+            deps=import_deps,
+            params={'project_id': config.project_id, 'language': config.language,
+                    'snap_tolerance': config.snap_tolerance,
+                    'proxy_dir': str(config.proxy_dir) if config.proxy_dir else None,
+                    'proxy_format': config.proxy_format}))
+    return steps
+
+
+def find_videos(input_dir):
+    return sorted(p for p in Path(input_dir).glob('**/*')
+                  if p.is_file() and p.suffix.lower() in VIDEO_EXTENSIONS)
+
+
+def run_pipeline(videos, config: PipelineConfig, workers=4, input_dir=None):
+    """
+    以视频为单位并行运行流水线
+
+    每个视频的步骤在依赖完成后立即提交到共享线程池，
+    不需要等待整批视频完成上一阶段。状态在每个步骤完成后写入清单，
+    中途失败后重新运行时，输入未变化的步骤会被跳过。
+
+    Args:
+        videos: 视频文件列表
+        config: 流水线配置
+        workers: 并行执行的步骤数
+        input_dir: 视频根目录，输出按相对该目录的路径命名，见 job_name
+
+    Returns:
+        list: 所有视频的 VideoJob
+    """
+    steps = build_steps(config)
+    jobs = [VideoJob(video, config, job_name(video, input_dir)) for video in videos]
+    counts = Counter(job.name for job in jobs)
+    duplicates = sorted(str(name) for name, count in counts.items() if count > 1)
+    if duplicates:
+        raise ValueError(f"以下视频的输出名重复，会互相覆盖: {', '.join(duplicates)}")
+
+    def ready_steps(job):
+        return [step for step in steps
+                if step.name not in job.status
+                and all(job.status.get(dep) in ('done', 'skipped') for dep in step.deps)]
+
+    def blocked_steps(job):
+        return [step for step in steps
+                if step.name not in job.status
+                and any(job.status.get(dep) in ('failed', 'blocked') for dep in step.deps)]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+
+        def submit_ready(job):
+            for step in ready_steps(job):
+                job.status[step.name] = 'running'
+                pending[executor.submit(job.execute, step)] = (job, step)
+
+        for job in jobs:
+            submit_ready(job)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                job, step = pending.pop(future)
+                try:
+                    executed = future.result()
+                    job.status[step.name] = 'done' if executed else 'skipped'
+                    print(f"[{job.name}] {step.name}: {'完成' if executed else '未变化，跳过'}")
+                except Exception as e:
+                    job.status[step.name] = 'failed'
+                    print(f"[{job.name}] {step.name}: 失败 {e}")
+                    while True:
+                        blocked = blocked_steps(job)
+                        if not blocked:
+                            break
+                        for s in blocked:
+                            job.status[s.name] = 'blocked'
+                job.save()
+                submit_ready(job)
+
+    return jobs
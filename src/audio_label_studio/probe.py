@@ -0,0 +1,99 @@
+import json
+import subprocess
+import threading
+from pathlib import Path
+
+
+# (tool, path, size, mtime_ns) -> 探测工具输出的 JSON 解析结果
+_probe_cache = {}
+_probe_lock = threading.Lock()
+
+
+def _cache_key(tool, path: Path):
+    stat = path.stat()
+    return (tool, str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+
+
+def _cached_json(tool, path, command, ok_returncodes=(0,)):
+    path = Path(path)
+    key = _cache_key(tool, path)
+    with _probe_lock:
+        if key in _probe_cache:
+            return _probe_cache[key]
+
+    # 只解析 stdout，诊断信息写在 stderr 中，不能混入 JSON
+    completed = subprocess.run(command, capture_output=True)
+    if completed.returncode not in ok_returncodes:
+        raise subprocess.CalledProcessError(
+            completed.returncode, command, output=completed.stdout, stderr=completed.stderr)
+    info = json.loads(completed.stdout.decode('utf-8'))
+
+    with _probe_lock:
+        # 同一工具、同一路径只保留最新一次的结果
+        for old_key in [k for k in _probe_cache if k[:2] == key[:2]]:
+            del _probe_cache[old_key]
+        _probe_cache[key] = info
+    return info
+
+
+def probe(path):
+    """
+    使用 `mkvmerge -J` 获取媒体文件的轨道信息
+
+    结果按 (路径, 大小, 修改时间) 缓存，文件未变化时不会重复调用 mkvmerge。
+    输出为机器可读的 JSON，不依赖 mkvinfo 的本地化文本。
+
+    Args:
+        path: 媒体文件路径
+
+    Returns:
+        dict: mkvmerge 的 JSON 识别结果
+    """
+    # mkvmerge 只有警告时退出码为 1，此时输出的 JSON 仍然可用
+    return _cached_json('mkvmerge', path, ['mkvmerge', '-J', str(path)], ok_returncodes=(0, 1))
+
+
+def probe_video(path):
+    """
+    使用 ffprobe 获取第一个视频流的尺寸和文件时长，缓存方式与 probe() 相同
+
+    Returns:
+        dict: {'width', 'height', 'duration'}
+    """
+    info = _cached_json('ffprobe', path, [
+        'ffprobe', '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'stream=width,height:format=duration',
+        '-of', 'json', str(path),
+    ])
+    stream = info['streams'][0]
+    return {
+        'width': int(stream['width']),
+        'height': int(stream['height']),
+        'duration': float(info.get('format', {}).get('duration', 0.0)),
+    }
+
+
+def subtitle_tracks(info: dict):
+    """
+    从探测结果中筛选字幕轨道
+
+    Args:
+        info: probe() 的返回结果
+
+    Returns:
+        list: [(track_id, language), ...]，track_id 可直接用于 mkvextract
+    """
+    tracks = []
+    for track in info.get('tracks', []):
+        if track.get('type') != 'subtitles':
+            continue
+        properties = track.get('properties', {})
+        lang = properties.get('language') or 'und'
+        tracks.append((track['id'], lang.lower()))
+    return tracks
+
+
+def clear_cache():
+    with _probe_lock:
+        _probe_cache.clear()
@@ -0,0 +1,292 @@
+import atexit
+import contextvars
+import cProfile
+import itertools
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+
+PROFILE_MODES = ('cprofile', 'sampling')
+
+_sequence = itertools.count()
+
+# 当前正在分析的请求，通过 submit_profiled 传递给线程池中的任务
+_active_scope = contextvars.ContextVar('profile_scope', default=None)
+
+
+def default_profile_dir():
+    return Path(os.getenv('PROFILE_DIR', 'profiles'))
+
+
+def _output_path(output_dir, name, suffix):
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    return output_dir / f'{name}-{stamp}-{os.getpid()}-{next(_sequence)}{suffix}'
+
+
+class SamplingProfiler:
+    def __init__(self, interval=0.005, thread_ids=None):
+        """
+        低开销的采样分析器，定期抓取线程调用栈
+
+        Args:
+            interval: 采样间隔（秒）
+            thread_ids: 只采样这些线程，为 None 时采样除自身外的所有线程
+        """
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _collapse(frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f'{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})')
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if self.thread_ids is not None and thread_id not in self.thread_ids:
+                    continue
+                self.samples[self._collapse(frame)] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def write(self, path):
+        """写出 collapsed stack 格式，可直接用于 flamegraph.pl 或 speedscope"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+class _ProfileScope:
+    def __init__(self, mode):
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.thread_ids = {threading.get_ident()}
+        self.profiles = []
+        self.closed = False
+
+    def add_profile(self, profiler):
+        with self.lock:
+            if not self.closed:
+                self.profiles.append(profiler)
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            return list(self.profiles)
+
+
+def _profiled_call(fn, *args):
+    scope = _active_scope.get()
+    if scope is None:
+        return fn(*args)
+    if scope.mode == 'sampling':
+        thread_id = threading.get_ident()
+        scope.thread_ids.add(thread_id)
+        try:
+            return fn(*args)
+        finally:
+            scope.thread_ids.discard(thread_id)
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12 起 cProfile 基于 sys.monitoring，同一时间只能启用一个，
+        # 此时请求线程上的分析器已经能统计到其他线程
+        return fn(*args)
+    try:
+        return fn(*args)
+    finally:
+        profiler.disable()
+        scope.add_profile(profiler)
+
+
+def submit_profiled(executor, fn, *args):
+    """
+    将任务提交到线程池，若当前处于被分析的请求中，该任务所在的线程也一并分析
+
+    Returns:
+        concurrent.futures.Future
+    """
+    context = contextvars.copy_context()
+    return executor.submit(context.run, _profiled_call, fn, *args)
+
+
+class ProfileController:
+    def __init__(self, output_dir=None):
+        """
+        按需开启的性能分析，供服务端管理接口使用
+
+        支持两种方式：分析接下来的 N 个请求（cProfile 或采样），
+        或在一段时间窗口内对整个进程采样。
+        """
+        self.output_dir = Path(output_dir) if output_dir else default_profile_dir()
+        self._lock = threading.Lock()
+        # 同一时间只分析一个请求，避免多个 cProfile 互相干扰
+        self._request_lock = threading.Lock()
+        self.remaining = 0
+        self.mode = 'cprofile'
+        self.window_until = None
+        self.outputs = []
+
+    def profile_requests(self, count, mode='cprofile'):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f'不支持的分析方式: {mode}')
+        with self._lock:
+            self.remaining = count
+            self.mode = mode
+
+    def profile_window(self, seconds, interval=0.005):
+        """在后台对整个进程采样 seconds 秒，结束后写出结果"""
+        with self._lock:
+            if self.window_until is not None:
+                raise RuntimeError('已有正在进行的采样窗口')
+            self.window_until = time.time() + seconds
+
+        profiler = SamplingProfiler(interval)
+        profiler.start()
+
+        def finish():
+            profiler.stop()
+            path = _output_path(self.output_dir, 'window', '.folded')
+            profiler.write(path)
+            with self._lock:
+                self.window_until = None
+                self.outputs.append(str(path))
+
+        timer = threading.Timer(seconds, finish)
+        timer.daemon = True
+        timer.start()
+
+    def cancel(self):
+        with self._lock:
+            self.remaining = 0
+
+    def _claim(self):
+        with self._lock:
+            if self.remaining <= 0:
+                return None
+            if not self._request_lock.acquire(blocking=False):
+                return None
+            self.remaining -= 1
+            return self.mode
+
+    @contextmanager
+    def request(self, name):
+        """
+        包裹一次请求的处理过程，仍有待分析的请求数时对其进行分析
+
+        请求中通过 submit_profiled 提交到线程池的任务（如对冲OCR的后端调用）
+        也计入本次分析结果。
+        """
+        mode = self._claim()
+        if mode is None:
+            yield
+            return
+
+        scope = _ProfileScope(mode)
+        token = _active_scope.set(scope)
+        try:
+            if mode == 'cprofile':
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    yield
+                finally:
+                    profiler.disable()
+                    stats = pstats.Stats(profiler)
+                    for worker_profiler in scope.close():
+                        stats.add(worker_profiler)
+                    path = _output_path(self.output_dir, name, '.pstats')
+                    stats.dump_stats(path)
+            else:
+                profiler = SamplingProfiler(thread_ids=scope.thread_ids)
+                profiler.start()
+                try:
+                    yield
+                finally:
+                    profiler.stop()
+                    scope.close()
+                    path = _output_path(self.output_dir, name, '.folded')
+                    profiler.write(path)
+            with self._lock:
+                self.outputs.append(str(path))
+        finally:
+            _active_scope.reset(token)
+            self._request_lock.release()
+
+    def status(self):
+        with self._lock:
+            return {
+                'remaining_requests': self.remaining,
+                'mode': self.mode,
+                'window_until': self.window_until,
+                'output_dir': str(self.output_dir),
+                'outputs': self.outputs[-20:],
+            }
+
+
+def add_profile_arguments(parser):
+    """为脚本添加 --profile 相关参数"""
+    parser.add_argument('--profile', action='store_true',
+                        help='分析本次运行的性能，结果写入 --profile-dir')
+    parser.add_argument('--profile-mode', choices=PROFILE_MODES, default='cprofile',
+                        help='cprofile 输出 pstats，只统计主线程；sampling 输出 flamegraph '
+                             '可用的 collapsed stack，包含所有线程。默认cprofile')
+    parser.add_argument('--profile-dir', default=None,
+                        help='分析结果目录，默认为环境变量 PROFILE_DIR 或 profiles')
+
+
+def start_profile_from_args(args, name):
+    """
+    根据 --profile 参数开始分析，进程退出时写出结果
+    """
+    if not getattr(args, 'profile', False):
+        return
+    output_dir = Path(args.profile_dir) if args.profile_dir else default_profile_dir()
+
+    if args.profile_mode == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+        def finish():
+            profiler.disable()
+            path = _output_path(output_dir, name, '.pstats')
+            profiler.dump_stats(path)
+            print(f'性能分析结果已写入: {path}')
+    else:
+        profiler = SamplingProfiler()
+        profiler.start()
+
+        def finish():
+            profiler.stop()
+            path = _output_path(output_dir, name, '.folded')
+            profiler.write(path)
+            print(f'性能分析结果已写入: {path}')
+
+    atexit.register(finish)
@@ -0,0 +1,136 @@
+import subprocess
+from pathlib import Path
+
+
+# ffmpeg 启动时会打开全部输出文件，每次调用的输出数需远小于默认的 1024 个文件描述符限制
+MAX_OUTPUTS_PER_CALL = 200
+
+
+def plan_segments(subtitles, mode='line', window=30.0, padding=0.2):
+    """
+    根据字幕时间轴规划音频切片
+
+    Args:
+        subtitles: [{'start', 'end', 'text'}, ...]，时间单位为秒
+        mode: 'line' 每条字幕一个切片；'window' 将相邻字幕合并为不超过 window 秒的切片
+        window: window 模式下单个切片的最大时长（秒）
+        padding: 切片前后额外保留的时长（秒）
+
+    Returns:
+        list: [{'index', 'start', 'end', 'subtitles'}, ...]，start/end 为整集时间轴上的秒数
+    """
+    if mode not in ('line', 'window'):
+        raise ValueError(f'不支持的切片模式: {mode}')
+
+    subtitles = sorted(subtitles, key=lambda s: (s['start'], s['end']))
+    groups = []
+    for subtitle in subtitles:
+        if subtitle['end'] <= subtitle['start']:
+            continue
+        if (mode == 'window' and groups
+                and subtitle['end'] - groups[-1][0]['start'] <= window):
+            groups[-1].append(subtitle)
+        else:
+            groups.append([subtitle])
+
+    segments = []
+    for index, group in enumerate(groups):
+        start = max(0.0, group[0]['start'] - padding)
+        end = max(s['end'] for s in group) + padding
+        segments.append({
+            'index': index,
+            'start': start,
+            'end': end,
+            'subtitles': group,
+        })
+    return segments
+
+
+def segment_file_name(audio_file: Path, segment: dict):
+    return f"{audio_file.stem}_{segment['index']:05d}.wav"
+
+
+def cut_segments(audio_file, segments, output_dir):
+    """
+    使用尽量少的ffmpeg调用把整集音频切成多个片段
+
+    每次调用中输入只解码一遍，每个切片作为一个独立的输出，通过输出端的 -ss/-to 截取。
+    ffmpeg 启动时就会打开所有输出文件，因此每次调用最多 MAX_OUTPUTS_PER_CALL 个切片，
+    台词上千条的整集或电影会分成几次调用，避免超出打开文件数限制。
+
+    Args:
+        audio_file: 整集音频文件
+        segments: plan_segments() 的返回结果
+        output_dir: 切片输出目录
+
+    Returns:
+        list: 与 segments 一一对应的切片文件路径
+    """
+    audio_file = Path(audio_file)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    if not segments:
+        return []
+
+    outputs = []
+    for first in range(0, len(segments), MAX_OUTPUTS_PER_CALL):
+        command = ['ffmpeg', '-y', '-loglevel', 'error', '-i', str(audio_file)]
+        for segment in segments[first:first + MAX_OUTPUTS_PER_CALL]:
+            output_path = output_dir / segment_file_name(audio_file, segment)
+            command.extend([
+                '-map', '0:a:0',
+                '-ss', f"{segment['start']:.3f}",
+                '-to', f"{segment['end']:.3f}",
+                '-acodec', 'pcm_s16le',
+                str(output_path),
+            ])
+            outputs.append(output_path)
+        subprocess.run(command, check=True, capture_output=True)
+    return outputs
+
+
+def segment_task_data(segment: dict, audio_uri: str, episode: str):
+    """
+    构造切片任务的数据，offset 记录切片在整集中的起始时间
+    """
+    return {
+        'audio': audio_uri,
+        'episode': episode,
+        'segment': segment['index'],
+        'offset': round(segment['start'], 3),
+        'duration': round(segment['end'] - segment['start'], 3),
+    }
+
+
+def shift_subtitles(subtitles, offset):
+    """
+    将字幕时间从整集时间轴平移到切片时间轴
+    """
+    return [
+        {**subtitle,
+         'start': max(0.0, subtitle['start'] - offset),
+         'end': max(0.0, subtitle['end'] - offset)}
+        for subtitle in subtitles
+    ]
+
+
+def restore_episode_timecodes(results, offset):
+    """
+    将切片任务上的标注结果映射回整集时间轴
+
+    Args:
+        results: Label Studio 标注的 result 列表
+        offset: 切片任务数据中的 offset
+
+    Returns:
+        list: start/end 已加上 offset 的 result 列表
+    """
+    restored = []
+    for result in results:
+        value = dict(result.get('value', {}))
+        for key in ('start', 'end'):
+            if key in value:
+                value[key] = round(value[key] + offset, 3)
+        restored.append({**result, 'value': value})
+    return restored
@@ -0,0 +1,55 @@
+import re
+
+
+def parse_time(time_str):
+    """将时间字符串转换为秒数"""
+    h, m, s = time_str.split(':')
+    return float(h) * 3600 + float(m) * 60 + float(s)
+
+
+def parse_subtitle_line(line):
+    """解析字幕行，返回开始时间、结束时间和文本"""
+    pattern = r'Dialogue: \d+,(\d+:\d+:\d+\.\d+),(\d+:\d+:\d+\.\d+),([^,]+),,.*?,,(.*)'
+    match = re.match(pattern, line)
+    if match:
+        start_time, end_time, style, text = match.groups()
+        # 移除文本中的样式标签
+        text = re.sub(r'\{[^}]*\}', '', text)
+        return {
+            'start': parse_time(start_time),
+            'end': parse_time(end_time),
+            'text': text.strip()
+        }
+    return None
+
+
+def read_subtitle_file(file_path, language=None):
+    """读取字幕文件并返回指定语言的字幕，language 为 None 时返回全部"""
+    subtitles = []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('Dialogue:'):
+                if language is None or language in line:
+                    subtitle = parse_subtitle_line(line)
+                    if subtitle:
+                        subtitles.append(subtitle)
+    return subtitles
+
+
+def create_annotation_result(subtitles, to_name='audio'):
+    """将字幕转换为 Label Studio 转写标注，to_name 为标注配置中音频/视频对象的名称"""
+    results = []
+    for subtitle in subtitles:
+        result = {
+            'from_name': 'transcription',
+            'to_name': to_name,
+            'type': 'textarea',
+            'value': {
+                'start': subtitle['start'],
+                'end': subtitle['end'],
+                'text': [subtitle['text']],
+                'channel': 0,
+            }
+        }
+        results.append(result)
+    return results
@@ -0,0 +1,38 @@
+import os
+from pathlib import Path
+
+from .waveform import proxy_paths
+
+
+def get_audio_file_path(audio_file: Path):
+    """
+    将本地文件路径转换为Label Studio可访问的本地文件URL
+    """
+    local_storage_path = os.environ['LABEL_STUDIO_LOCAL_FILES_DOCUMENT_ROOT']
+    relative_path = Path(audio_file).relative_to(local_storage_path)
+    uri = f'/data/local-files/?d={relative_path}'
+    return uri
+
+
+def get_audio_task_data(audio_file: Path, proxy_dir=None, proxy_format='opus'):
+    """
+    构造整集音频任务的数据
+
+    指定 proxy_dir 且代理文件已生成时，任务指向压缩代理音频和预计算的波形峰值，
+    原始WAV保留在 source 字段中
+    """
+    task_data = {
+        'audio': get_audio_file_path(audio_file)
+    }
+    if proxy_dir is None:
+        return task_data
+
+    proxy_path, peaks_path = proxy_paths(audio_file, proxy_dir, proxy_format)
+    if not proxy_path.exists():
+        print(f"警告: 未找到音频 {audio_file.name} 的代理文件，使用原始WAV")
+        return task_data
+    task_data['source'] = task_data['audio']
+    task_data['audio'] = get_audio_file_path(proxy_path)
+    if peaks_path.exists():
+        task_data['peaks'] = get_audio_file_path(peaks_path)
+    return task_data
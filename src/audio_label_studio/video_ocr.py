@@ -0,0 +1,167 @@
+import subprocess
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+from .probe import probe_video
+
+
+def band_geometry(width, height, band=(0.75, 1.0)):
+    """
+    将字幕区域（按画面高度的比例表示）转换为像素坐标
+
+    Returns:
+        tuple: (y, h)，均为偶数以兼容 yuv 格式的裁剪
+    """
+    top, bottom = band
+    if not 0 <= top < bottom <= 1:
+        raise ValueError(f'无效的字幕区域: {band}')
+    y = int(height * top) // 2 * 2
+    h = max(2, (int(height * bottom) - y) // 2 * 2)
+    return y, min(h, height - y)
+
+
+def iter_band_frames(video, fps=2.0, band=(0.75, 1.0), batch_size=16):
+    """
+    使用ffmpeg按固定帧率采样视频，只输出字幕区域，通过管道读取，不写入磁盘
+
+    Yields:
+        tuple: (首帧序号, np.ndarray)，数组形状为 (n, h, w, 3)，n <= batch_size
+
+    Raises:
+        subprocess.CalledProcessError: ffmpeg 以非零状态退出（如视频损坏或解码失败）
+    """
+    info = probe_video(video)
+    width = info['width']
+    y, h = band_geometry(width, info['height'], band)
+    frame_bytes = width * h * 3
+
+    command = [
+        'ffmpeg', '-loglevel', 'error',
+        '-i', str(video),
+        '-an', '-sn',
+        '-vf', f'fps={fps},crop={width}:{h}:0:{y}',
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+        'pipe:1',
+    ]
+    # stderr 写入临时文件而不是管道，ffmpeg 输出大量错误时不会因管道写满而阻塞
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr,
+                                   bufsize=frame_bytes * batch_size)
+        finished = False
+        index = 0
+        try:
+            while True:
+                data = process.stdout.read(frame_bytes * batch_size)
+                n = len(data) // frame_bytes
+                if n == 0:
+                    break
+                frames = np.frombuffer(data[:n * frame_bytes], dtype=np.uint8)
+                yield index, frames.reshape(n, h, width, 3)
+                index += n
+            finished = True
+        finally:
+            process.stdout.close()
+            if not finished:
+                # 调用方提前停止读取，不再需要剩余的帧
+                process.kill()
+            returncode = process.wait()
+
+        if returncode != 0:
+            stderr.seek(0)
+            raise subprocess.CalledProcessError(
+                returncode, command, stderr=stderr.read().decode('utf-8', errors='replace'))
+
+
+def difference_hash(frames, hash_size=(8, 32)):
+    """
+    对一批帧计算差值哈希（dHash）
+
+    先转为灰度并按块求均值缩小到 (rows, cols + 1)，再比较水平相邻像素。
+    整批帧一次向量化计算。
+
+    Args:
+        frames: (n, h, w, 3) 的 uint8 数组
+        hash_size: (rows, cols)，字幕区域较宽，默认使用 8x32 位
+
+    Returns:
+        tuple: (哈希 (n, rows * cols) 的布尔数组, 每帧灰度标准差 (n,))
+    """
+    rows, cols = hash_size
+    gray = (np.float32(0.299) * frames[..., 0]
+            + np.float32(0.587) * frames[..., 1]
+            + np.float32(0.114) * frames[..., 2])
+    n, h, w = gray.shape
+    if h == 0 or w == 0:
+        raise ValueError(f'字幕区域为空: {h}x{w}')
+    # 区域小于哈希网格时按最近邻放大，保证每块至少一个像素
+    if h < rows:
+        gray = np.repeat(gray, -(-rows // h), axis=1)
+    if w < cols + 1:
+        gray = np.repeat(gray, -(-(cols + 1) // w), axis=2)
+    n, h, w = gray.shape
+    bh, bw = h // rows, w // (cols + 1)
+    blocks = gray[:, :bh * rows, :bw * (cols + 1)].reshape(n, rows, bh, cols + 1, bw)
+    small = blocks.mean(axis=(2, 4))
+    bits = small[:, :, 1:] > small[:, :, :-1]
+    return bits.reshape(n, -1), gray.reshape(n, -1).std(axis=1)
+
+
+def _ocr_text(model, frame):
+    results = model.predict(Image.fromarray(frame))
+    return ''.join(text for text, _ in results).strip()
+
+
+def extract_hard_subtitles(video, model, fps=2.0, band=(0.75, 1.0),
+                           hash_threshold=12, min_contrast=8.0):
+    """
+    识别视频中的硬字幕
+
+    字幕区域的感知哈希与上次识别时相差不超过 hash_threshold 位时复用上次结果；
+    灰度标准差低于 min_contrast 的空白区域直接视为无字幕，不调用OCR。
+
+    Args:
+        video: 视频文件路径
+        model: OCRModel 实例
+        fps: 采样帧率
+        band: 字幕区域 (top, bottom)，按画面高度的比例
+        hash_threshold: 判定字幕变化的汉明距离阈值
+        min_contrast: 判定空白区域的灰度标准差阈值
+
+    Returns:
+        tuple: ([{'start', 'end', 'text'}, ...], 统计信息 dict)
+    """
+    frame_seconds = 1.0 / fps
+    segments = []
+    stats = {'frames': 0, 'ocr_calls': 0, 'blank_frames': 0}
+    last_hash = None
+    last_text = ''
+
+    for first, frames in iter_band_frames(video, fps, band):
+        hashes, contrast = difference_hash(frames)
+        for i, frame in enumerate(frames):
+            stats['frames'] += 1
+            if contrast[i] < min_contrast:
+                stats['blank_frames'] += 1
+                text = ''
+                last_hash = None
+            elif last_hash is not None and np.count_nonzero(hashes[i] != last_hash) <= hash_threshold:
+                text = last_text
+            else:
+                text = _ocr_text(model, frame)
+                stats['ocr_calls'] += 1
+                last_hash = hashes[i]
+            last_text = text
+
+            start = (first + i) * frame_seconds
+            if segments and segments[-1]['text'] == text:
+                segments[-1]['end'] = start + frame_seconds
+            else:
+                segments.append({'start': start, 'end': start + frame_seconds, 'text': text})
+
+    segments = [
+        {**s, 'start': round(s['start'], 3), 'end': round(s['end'], 3)}
+        for s in segments if s['text']
+    ]
+    return segments, stats
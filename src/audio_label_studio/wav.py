@@ -0,0 +1,121 @@
+import struct
+from pathlib import Path
+
+import numpy as np
+
+
+_PCM = 1
+_IEEE_FLOAT = 3
+_EXTENSIBLE = 0xFFFE
+
+
+class WavInfo:
+    def __init__(self, channels, sample_rate, bits, audio_format,
+                 data_offset, data_size):
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.bits = bits
+        self.audio_format = audio_format
+        self.data_offset = data_offset
+        self.data_size = data_size
+
+    @property
+    def dtype(self):
+        if self.audio_format == _IEEE_FLOAT and self.bits == 32:
+            return np.dtype('<f4')
+        if self.audio_format == _PCM and self.bits == 16:
+            return np.dtype('<i2')
+        if self.audio_format == _PCM and self.bits == 32:
+            return np.dtype('<i4')
+        raise ValueError(
+            f'不支持的WAV采样格式: format={self.audio_format}, bits={self.bits}')
+
+    @property
+    def frames(self):
+        return self.data_size // (self.channels * self.bits // 8)
+
+    @property
+    def duration(self):
+        return self.frames / self.sample_rate
+
+    @property
+    def full_scale(self):
+        """采样值的满幅，用于归一化到 [-1, 1]"""
+        if self.dtype.kind == 'f':
+            return 1.0
+        return float(2 ** (self.bits - 1))
+
+
+def read_wav_info(path):
+    """
+    解析WAV文件头，返回采样格式和数据块位置，不读取音频数据
+    """
+    path = Path(path)
+    file_size = path.stat().st_size
+    with open(path, 'rb') as f:
+        riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave != b'WAVE':
+            raise ValueError(f'不是有效的WAV文件: {path}')
+
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                break
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                body = f.read(chunk_size)
+                audio_format, channels, sample_rate, _, _, bits = struct.unpack(
+                    '<HHIIHH', body[:16])
+                if audio_format == _EXTENSIBLE and len(body) >= 26:
+                    audio_format = struct.unpack('<H', body[24:26])[0]
+                fmt = (channels, sample_rate, bits, audio_format)
+                if chunk_size % 2:
+                    f.seek(1, 1)
+            elif chunk_id == b'data':
+                if fmt is None:
+                    raise ValueError(f'WAV文件缺少fmt块: {path}')
+                data_offset = f.tell()
+                # 超过4GB或流式写出的文件头中的长度可能不准确，以实际文件大小为准
+                data_size = chunk_size
+                if data_size in (0, 0xFFFFFFFF) or data_size > file_size - data_offset:
+                    data_size = file_size - data_offset
+                channels, sample_rate, bits, audio_format = fmt
+                return WavInfo(channels, sample_rate, bits, audio_format,
+                               data_offset, data_size)
+            else:
+                f.seek(chunk_size + chunk_size % 2, 1)
+
+    raise ValueError(f'WAV文件缺少data块: {path}')
+
+
+def iter_mono_chunks(path, info: WavInfo, chunk_frames):
+    """
+    按块遍历音频，返回归一化到 [-1, 1] 的单声道 float32 数据
+
+    每块单独内存映射文件中对应的区间，转换后立即解除映射。
+    只映射一次整个文件时，已访问的页面会一直计入进程内存，直到遍历结束。
+
+    Args:
+        path: WAV文件路径
+        info: read_wav_info 的返回值
+        chunk_frames: 每块的帧数
+
+    Yields:
+        tuple: (起始帧, np.ndarray)
+    """
+    frame_bytes = info.channels * info.dtype.itemsize
+    for start in range(0, info.frames, chunk_frames):
+        count = min(chunk_frames, info.frames - start)
+        window = np.memmap(path, dtype=info.dtype, mode='r',
+                           offset=info.data_offset + start * frame_bytes,
+                           shape=(count, info.channels))
+        # astype 会复制数据，之后即可解除映射
+        chunk = window.astype(np.float32)
+        del window
+        if info.channels > 1:
+            chunk = chunk.mean(axis=1)
+        else:
+            chunk = chunk[:, 0]
+        chunk /= info.full_scale
+        yield start, chunk
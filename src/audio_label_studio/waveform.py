@@ -0,0 +1,95 @@
+import json
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+from .wav import read_wav_info, iter_mono_chunks
+
+
+# 代理音频格式及其对应的编码器和扩展名
+PROXY_FORMATS = {
+    'opus': ('libopus', '.opus'),
+    'mp3': ('libmp3lame', '.mp3'),
+}
+
+
+def proxy_paths(audio_file, output_dir, proxy_format='opus'):
+    """
+    返回音频文件对应的代理音频和波形峰值文件路径
+    """
+    audio_file = Path(audio_file)
+    output_dir = Path(output_dir)
+    _, ext = PROXY_FORMATS[proxy_format]
+    return (output_dir / f'{audio_file.stem}{ext}',
+            output_dir / f'{audio_file.stem}.peaks.json')
+
+
+def make_proxy(audio_file, output_path, proxy_format='opus', bitrate='48k'):
+    """
+    使用ffmpeg将WAV压缩为体积较小的单声道代理音频
+    """
+    if proxy_format not in PROXY_FORMATS:
+        raise ValueError(
+            f'不支持的代理格式: {proxy_format}。支持的格式: {", ".join(PROXY_FORMATS.keys())}')
+    codec, _ = PROXY_FORMATS[proxy_format]
+    command = [
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-i', str(audio_file),
+        '-vn',
+        '-ac', '1',
+        '-acodec', codec,
+        '-b:a', bitrate,
+        str(output_path),
+    ]
+    subprocess.run(command, check=True, capture_output=True)
+
+
+def compute_peaks(audio_file, samples_per_pixel=512, chunk_pixels=4096):
+    """
+    计算波形峰值数据
+
+    按块内存映射WAV，每块包含 chunk_pixels 个像素的采样，
+    内存占用与音频时长无关。
+
+    Args:
+        audio_file: WAV文件路径
+        samples_per_pixel: 每个像素对应的采样数（固定分辨率）
+        chunk_pixels: 每次处理的像素数
+
+    Returns:
+        dict: audiowaveform JSON 格式的峰值数据（8位，单声道）
+    """
+    info = read_wav_info(audio_file)
+    chunk_frames = samples_per_pixel * chunk_pixels
+
+    data = []
+    for _, chunk in iter_mono_chunks(audio_file, info, chunk_frames):
+        pixels = -(-len(chunk) // samples_per_pixel)
+        pad = pixels * samples_per_pixel - len(chunk)
+        if pad:
+            # 最后一块不足一个像素时用边缘值补齐，不影响最大/最小值
+            chunk = np.pad(chunk, (0, pad), mode='edge')
+        blocks = chunk.reshape(pixels, samples_per_pixel)
+        peaks = np.empty((pixels, 2), dtype=np.float32)
+        peaks[:, 0] = blocks.min(axis=1)
+        peaks[:, 1] = blocks.max(axis=1)
+        peaks = np.clip(np.round(peaks * 127), -128, 127).astype(np.int8)
+        data.extend(peaks.ravel().tolist())
+
+    return {
+        'version': 2,
+        'channels': 1,
+        'sample_rate': info.sample_rate,
+        'samples_per_pixel': samples_per_pixel,
+        'bits': 8,
+        'length': len(data) // 2,
+        'data': data,
+    }
+
+
+def write_peaks(audio_file, output_path, samples_per_pixel=512):
+    peaks = compute_peaks(audio_file, samples_per_pixel)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(peaks, f, separators=(',', ':'))
+    return peaks
@@ -0,0 +1,176 @@
+import io
+import threading
+import time
+
+import pytest
+from PIL import Image, ImageFile
+
+from audio_label_studio import ocr_predict
+from audio_label_studio.admission import MemoryBudget, AdmissionRejected
+from audio_label_studio.model import OCRModel, HedgedOCRModel
+
+
+def hold(budget, cost, release):
+    """在后台线程中预留 cost，直到 release 被设置"""
+    acquired = threading.Event()
+
+    def run():
+        with budget.reserve(cost):
+            acquired.set()
+            release.wait()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    acquired.wait()
+    return thread
+
+
+def test_admits_within_budget_and_reports_gauges():
+    budget = MemoryBudget(100)
+    with budget.reserve(60):
+        assert budget.gauges() == {
+            'budget': 100, 'reserved': 60, 'available': 40,
+            'waiting': 0, 'admitted': 1, 'rejected': 0,
+        }
+    assert budget.gauges()['reserved'] == 0
+
+
+def test_oversized_task_is_clamped_to_budget():
+    budget = MemoryBudget(100)
+    with budget.reserve(500) as cost:
+        assert cost == 100
+
+
+def test_wait_timeout_rejects():
+    budget = MemoryBudget(100, max_wait=0.1)
+    release = threading.Event()
+    thread = hold(budget, 80, release)
+
+    start = time.monotonic()
+    with pytest.raises(AdmissionRejected) as excinfo:
+        budget.acquire(50)
+    assert time.monotonic() - start >= 0.1
+    assert excinfo.value.retry_after == 1
+    assert budget.gauges()['rejected'] == 1
+    assert budget.gauges()['waiting'] == 0
+
+    release.set()
+    thread.join()
+
+
+def test_waiter_admitted_after_release():
+    budget = MemoryBudget(100, max_wait=2)
+    release = threading.Event()
+    thread = hold(budget, 80, release)
+
+    threading.Timer(0.1, release.set).start()
+    assert budget.acquire(50) == 50
+    thread.join()
+    assert budget.gauges()['reserved'] == 50
+
+
+def test_queue_limit_rejects_immediately():
+    budget = MemoryBudget(100, max_wait=2, max_waiters=1)
+    release = threading.Event()
+    thread = hold(budget, 100, release)
+
+    waiter = threading.Thread(target=lambda: budget.release(budget.acquire(50)), daemon=True)
+    waiter.start()
+    while budget.gauges()['waiting'] == 0:
+        time.sleep(0.01)
+
+    start = time.monotonic()
+    with pytest.raises(AdmissionRejected):
+        budget.acquire(50)
+    assert time.monotonic() - start < 0.5
+
+    release.set()
+    thread.join()
+    waiter.join()
+    assert budget.gauges()['admitted'] == 2
+    assert budget.gauges()['rejected'] == 1
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+        self.headers = {'Content-Length': str(len(content))}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+
+class FakeClient:
+    def __init__(self, content):
+        self.content = content
+
+    def request(self, method, path, **kwargs):
+        return FakeResponse(self.content)
+
+
+class SlowOCRModel(OCRModel):
+    def __init__(self, delay):
+        self.delay = delay
+
+    def predict(self, image):
+        time.sleep(self.delay)
+        return [('text', (0, 0, 1, 1))]
+
+
+def encode_image(size, format):
+    data = io.BytesIO()
+    Image.new('RGB', size).save(data, format=format)
+    return data.getvalue()
+
+
+@pytest.mark.parametrize('format', ['BMP', 'GIF', 'TIFF', 'PNG', 'JPEG'])
+def test_probe_image_size_reads_header_only(format):
+    # 只提供开头 64KB，远小于完整图片
+    data = encode_image((2000, 1500), format)
+    assert ocr_predict.probe_image_size(data[:64 * 1024]) == (2000, 1500)
+    assert ocr_predict.probe_image_size(data[:4]) is None
+
+
+def test_image_not_decoded_before_reservation(monkeypatch):
+    data = encode_image((2000, 1500), 'BMP')
+    budget = MemoryBudget(1024, max_wait=0.05, max_waiters=0)
+    budget.acquire(1024)
+    monkeypatch.setattr(ocr_predict, 'get_client', lambda: FakeClient(data))
+    monkeypatch.setattr(ocr_predict, 'memory_budget', budget)
+    opened = []
+    # load_prepare 会分配整张图片的像素缓冲区
+    monkeypatch.setattr(ImageFile.ImageFile, 'load_prepare',
+                        lambda self: opened.append(self.size))
+
+    with pytest.raises(AdmissionRejected):
+        with ocr_predict.open_task_image({'data': {'ocr': '/data/image.bmp'}}):
+            pass
+    assert opened == []
+
+
+@pytest.mark.parametrize('format', ['PNG', 'BMP', 'GIF'])
+def test_hedge_working_set_held_until_loser_finishes(monkeypatch, format):
+    budget = MemoryBudget(1024 * 1024 * 1024)
+    data = encode_image((200, 100), format)
+    monkeypatch.setattr(ocr_predict, 'get_client', lambda: FakeClient(data))
+    monkeypatch.setattr(ocr_predict, 'memory_budget', budget)
+    # 主模型落败但仍在运行，备用模型先返回
+    monkeypatch.setattr(ocr_predict, 'detect_model', HedgedOCRModel(
+        SlowOCRModel(0.5), SlowOCRModel(0.0), deadline=0.05))
+
+    bbox = {'id': 'abc', 'value': {'x': 0, 'y': 0, 'width': 50, 'height': 50}}
+    result = ocr_predict.auto_detect({'data': {'ocr': '/data/image.png'}}, bbox)
+
+    assert result['result']
+    assert budget.gauges()['reserved'] == ocr_predict.estimate_ocr_cost(100, 50, calls=2)
+    deadline = time.monotonic() + 2
+    while budget.gauges()['reserved'] and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert budget.gauges()['reserved'] == 0
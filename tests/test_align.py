@@ -0,0 +1,37 @@
+from audio_label_studio.align import snap_to_boundaries
+
+
+def test_snaps_within_tolerance():
+    subtitles = [{'start': 1.1, 'end': 2.2, 'text': 'a'}]
+    snapped = snap_to_boundaries(subtitles, [1.0], [2.0], tolerance=0.3)
+    assert (snapped[0]['start'], snapped[0]['end']) == (1.0, 2.0)
+    assert subtitles[0]['start'] == 1.1
+
+
+def test_out_of_tolerance_keeps_original():
+    subtitles = [{'start': 1.0, 'end': 2.0, 'text': 'a'}]
+    snapped = snap_to_boundaries(subtitles, [5.0], [6.0], tolerance=0.3)
+    assert (snapped[0]['start'], snapped[0]['end']) == (1.0, 2.0)
+
+
+def test_neighbours_do_not_overlap_after_snapping():
+    # 前一条的终点被吸附到 2.2，后一条的起点被吸附到 2.0
+    subtitles = [{'start': 1.0, 'end': 2.0, 'text': 'a'},
+                 {'start': 2.1, 'end': 3.0, 'text': 'b'}]
+    snapped = snap_to_boundaries(subtitles, [1.0, 2.0], [2.2, 3.0], tolerance=0.3)
+    assert snapped[0]['end'] == 2.2
+    assert snapped[1]['start'] >= snapped[0]['end']
+
+
+def test_unsorted_input_is_clamped_in_time_order():
+    subtitles = [{'start': 2.1, 'end': 3.0, 'text': 'b'},
+                 {'start': 1.0, 'end': 2.0, 'text': 'a'}]
+    snapped = snap_to_boundaries(subtitles, [1.0, 2.0], [2.2, 3.0], tolerance=0.3)
+    assert snapped[0]['start'] >= snapped[1]['end']
+
+
+def test_overlapping_originals_are_left_alone():
+    subtitles = [{'start': 1.0, 'end': 3.0, 'text': 'a'},
+                 {'start': 2.0, 'end': 4.0, 'text': 'b'}]
+    snapped = snap_to_boundaries(subtitles, [1.0, 2.0], [3.0, 4.0], tolerance=0.3)
+    assert [(s['start'], s['end']) for s in snapped] == [(1.0, 3.0), (2.0, 4.0)]
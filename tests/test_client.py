@@ -0,0 +1,210 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+from audio_label_studio.client import LabelStudioClient, AsyncLabelStudioClient, LabelStudioError
+
+
+class FakeLabelStudio:
+    """
+    本地假服务：每个请求交给 handler(method, path, query, body) 处理，
+    返回 (状态码, JSON, 响应头)，并记录收到的请求
+    """
+
+    def __init__(self):
+        self.handler = lambda method, path, query, body: (200, {}, {})
+        self.requests = []
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                with fake.lock:
+                    fake.requests.append((self.command, url.path, query, body))
+                status, payload, headers = fake.handler(self.command, url.path, query, body)
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = _handle
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       kwargs={'poll_interval': 0.05}, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def fake():
+    server = FakeLabelStudio()
+    yield server
+    server.close()
+
+
+def fail_first(status, retry_after='0.2'):
+    """第一次请求返回 status（带 Retry-After），之后正常返回"""
+    calls = []
+
+    def handler(method, path, query, body):
+        calls.append(path)
+        if len(calls) == 1:
+            return status, {'detail': 'busy'}, {'Retry-After': retry_after}
+        return 201, {'id': 1}, {}
+    return handler
+
+
+def import_handler(method, path, query, body):
+    # 模拟 Label Studio 按顺序分配任务ID
+    start = import_handler.next_id
+    import_handler.next_id += len(body)
+    return 201, {'task_ids': list(range(start, start + len(body)))}, {}
+
+
+def paging_handler(total):
+    def handler(method, path, query, body):
+        page, page_size = int(query['page']), int(query['page_size'])
+        first = (page - 1) * page_size
+        if first >= total:
+            return 404, {'detail': 'Invalid page'}, {}
+        return 200, {'tasks': [{'id': i} for i in range(first, min(first + page_size, total))]}, {}
+    return handler
+
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_retries_with_retry_after(fake, status):
+    fake.handler = fail_first(status)
+    # backoff 很大，若未使用 Retry-After 会等待数秒
+    client = LabelStudioClient(fake.url, 'token', backoff=10)
+
+    start = time.monotonic()
+    assert client.create_task(1, {'audio': 'a.wav'}) == {'id': 1}
+    elapsed = time.monotonic() - start
+
+    assert len(fake.requests) == 2
+    assert 0.2 <= elapsed < 2
+    assert client.stats.snapshot()['retries'] == 1
+
+
+def test_post_not_retried_on_500(fake):
+    fake.handler = fail_first(500, retry_after='0')
+    client = LabelStudioClient(fake.url, 'token', backoff=0)
+
+    with pytest.raises(LabelStudioError) as excinfo:
+        client.create_task(1, {'audio': 'a.wav'})
+
+    assert excinfo.value.status_code == 500
+    assert len(fake.requests) == 1
+
+
+def test_import_tasks_chunks_and_keeps_order(fake):
+    import_handler.next_id = 100
+    fake.handler = import_handler
+    client = LabelStudioClient(fake.url, 'token')
+
+    task_ids = client.import_tasks(1, [{'data': {'n': i}} for i in range(7)], chunk_size=3)
+
+    assert task_ids == list(range(100, 107))
+    assert [len(body) for _, _, _, body in fake.requests] == [3, 3, 1]
+    assert [t['data']['n'] for _, _, _, body in fake.requests for t in body] == list(range(7))
+
+
+@pytest.mark.parametrize('total, pages', [(12, 3), (10, 3)])
+def test_iter_tasks_stops_on_short_page_or_404(fake, total, pages):
+    # 12 个任务在第3页不足一页时停止，10 个任务在第3页返回404时停止
+    fake.handler = paging_handler(total)
+    client = LabelStudioClient(fake.url, 'token')
+
+    tasks = list(client.iter_tasks(1, page_size=5))
+
+    assert [t['id'] for t in tasks] == list(range(total))
+    assert len(fake.requests) == pages
+
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_async_retries_with_retry_after(fake, status):
+    fake.handler = fail_first(status)
+
+    async def run():
+        client = AsyncLabelStudioClient(fake.url, 'token', backoff=10)
+        try:
+            return await client.create_task(1, {'audio': 'a.wav'})
+        finally:
+            await client.close()
+
+    start = time.monotonic()
+    assert asyncio.run(run()) == {'id': 1}
+    elapsed = time.monotonic() - start
+
+    assert len(fake.requests) == 2
+    assert 0.2 <= elapsed < 2
+
+
+def test_async_post_not_retried_on_500(fake):
+    fake.handler = fail_first(500, retry_after='0')
+
+    async def run():
+        client = AsyncLabelStudioClient(fake.url, 'token', backoff=0)
+        try:
+            await client.create_task(1, {'audio': 'a.wav'})
+        finally:
+            await client.close()
+
+    with pytest.raises(LabelStudioError) as excinfo:
+        asyncio.run(run())
+
+    assert excinfo.value.status_code == 500
+    assert len(fake.requests) == 1
+
+
+def test_async_import_tasks_chunks_and_keeps_order(fake):
+    import_handler.next_id = 100
+    fake.handler = import_handler
+
+    async def run():
+        client = AsyncLabelStudioClient(fake.url, 'token')
+        try:
+            return await client.import_tasks(1, [{'data': {'n': i}} for i in range(7)], chunk_size=3)
+        finally:
+            await client.close()
+
+    assert asyncio.run(run()) == list(range(100, 107))
+    assert [len(body) for _, _, _, body in fake.requests] == [3, 3, 1]
+
+
+@pytest.mark.parametrize('total, pages', [(12, 3), (10, 3)])
+def test_async_iter_tasks_stops_on_short_page_or_404(fake, total, pages):
+    fake.handler = paging_handler(total)
+
+    async def run():
+        client = AsyncLabelStudioClient(fake.url, 'token')
+        try:
+            return [task async for task in client.iter_tasks(1, page_size=5)]
+        finally:
+            await client.close()
+
+    tasks = asyncio.run(run())
+
+    assert [t['id'] for t in tasks] == list(range(total))
+    assert len(fake.requests) == pages
@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from audio_label_studio.model import OCRModel, HedgedOCRModel
+
+
+class FakeOCRModel(OCRModel):
+    def __init__(self, delay, results, error=None):
+        self.delay = delay
+        self.results = results
+        self.error = error
+
+    def predict(self, image):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.results
+
+
+def make_image():
+    return Image.new('RGB', (16, 16))
+
+
+def test_primary_wins_within_deadline():
+    model = HedgedOCRModel(FakeOCRModel(0.01, [('primary', (0, 0, 1, 1))]),
+                           FakeOCRModel(0.01, [('secondary', (0, 0, 1, 1))]),
+                           deadline=0.5)
+    assert model.predict(make_image())[0][0] == 'primary'
+    assert model.stats()['hedged'] == 0
+
+
+def test_secondary_started_when_primary_errors():
+    model = HedgedOCRModel(FakeOCRModel(0.0, [], error=RuntimeError('boom')),
+                           FakeOCRModel(0.01, [('secondary', (0, 0, 1, 1))]),
+                           deadline=0.5)
+    assert model.predict(make_image())[0][0] == 'secondary'
+    assert model.stats()['last_winner'] == 'FakeOCRModel'
+
+
+def test_hedge_bounds_latency_under_concurrent_slow_primary():
+    # 主模型很慢且并发数超过线程数，备用请求不能排在慢请求后面
+    model = HedgedOCRModel(FakeOCRModel(2.0, [('primary', (0, 0, 1, 1))]),
+                           FakeOCRModel(0.01, [('secondary', (0, 0, 1, 1))]),
+                           deadline=0.2, max_workers=8)
+
+    def timed_predict(_):
+        start = time.monotonic()
+        results = model.predict(make_image())
+        return time.monotonic() - start, results[0][0]
+
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        outcomes = list(pool.map(timed_predict, range(12)))
+
+    assert all(text == 'secondary' for _, text in outcomes)
+    assert max(elapsed for elapsed, _ in outcomes) < 1.0
@@ -0,0 +1,137 @@
+import pytest
+
+from audio_label_studio import pipeline
+from audio_label_studio.client import LabelStudioError
+from audio_label_studio.pipeline import PipelineConfig, VideoJob, job_name, run_pipeline
+
+
+class FakeClient:
+    def __init__(self):
+        self.tasks = {}
+        self.annotations = {}
+        self.calls = []
+
+    def create_task(self, project_id, data):
+        task_id = len(self.tasks) + 1
+        self.tasks[task_id] = data
+        self.calls.append(('create_task', task_id))
+        return {'id': task_id}
+
+    def update_task(self, task_id, data):
+        if task_id not in self.tasks:
+            raise LabelStudioError('PATCH', f'/api/tasks/{task_id}/', 404, 'Not found')
+        self.tasks[task_id] = data
+        self.calls.append(('update_task', task_id))
+        return {'id': task_id}
+
+    def create_annotation(self, task_id, result, **fields):
+        annotation_id = len(self.annotations) + 100
+        self.annotations[annotation_id] = result
+        self.calls.append(('create_annotation', annotation_id))
+        return {'id': annotation_id}
+
+    def update_annotation(self, annotation_id, result, **fields):
+        self.annotations[annotation_id] = result
+        self.calls.append(('update_annotation', annotation_id))
+        return {'id': annotation_id}
+
+
+def make_config(tmp_path, **kwargs):
+    return PipelineConfig(audio_dir=tmp_path / 'audio', subtitle_dir=tmp_path / 'subs',
+                          state_dir=tmp_path / 'state', **kwargs)
+
+
+def test_job_name_keeps_relative_directories(tmp_path):
+    config = make_config(tmp_path)
+    a = VideoJob(tmp_path / 'in/a/ep1.mkv', config, job_name(tmp_path / 'in/a/ep1.mkv', tmp_path / 'in'))
+    b = VideoJob(tmp_path / 'in/b/ep1.mkv', config, job_name(tmp_path / 'in/b/ep1.mkv', tmp_path / 'in'))
+
+    assert a.state_path != b.state_path
+    assert pipeline._audio_path(a) == tmp_path / 'audio/a/ep1.wav'
+    assert pipeline._audio_path(b) == tmp_path / 'audio/b/ep1.wav'
+
+
+def test_duplicate_output_names_rejected(tmp_path):
+    videos = [tmp_path / 'in/ep1.mkv', tmp_path / 'in/ep1.mp4']
+    with pytest.raises(ValueError):
+        run_pipeline(videos, make_config(tmp_path), input_dir=tmp_path / 'in')
+
+
+def test_audio_dir_change_invalidates_audio_step(tmp_path):
+    video = tmp_path / 'ep1.mkv'
+    video.write_bytes(b'video')
+    config = make_config(tmp_path)
+    job = VideoJob(video, config)
+    step = pipeline.build_steps(config)[0]
+
+    config.audio_dir = tmp_path / 'elsewhere'
+    moved = pipeline.build_steps(config)[0]
+    assert job.step_fingerprint(step) != job.step_fingerprint(moved)
+
+
+def test_reimport_updates_existing_task(tmp_path, monkeypatch):
+    monkeypatch.setenv('LABEL_STUDIO_LOCAL_FILES_DOCUMENT_ROOT', str(tmp_path))
+    monkeypatch.setattr(pipeline, 'read_subtitle_file', lambda path, language=None: [
+        {'start': 0.0, 'end': 1.0, 'text': 'hello'}])
+    client = FakeClient()
+    job = VideoJob(tmp_path / 'ep1.mkv', make_config(tmp_path, project_id=1, client=client))
+    job.state['steps']['subtitles'] = {'outputs': [str(tmp_path / 'ep1.ass')]}
+
+    _, first = pipeline._run_import(job, [])
+    job.state['steps']['import'] = {'result': first}
+    _, second = pipeline._run_import(job, [])
+
+    assert second['task_id'] == first['task_id']
+    assert second['annotation_id'] == first['annotation_id']
+    assert [name for name, _ in client.calls] == [
+        'create_task', 'create_annotation', 'update_task', 'update_annotation']
+
+
+def test_reimport_recreates_deleted_task(tmp_path, monkeypatch):
+    monkeypatch.setenv('LABEL_STUDIO_LOCAL_FILES_DOCUMENT_ROOT', str(tmp_path))
+    monkeypatch.setattr(pipeline, 'read_subtitle_file', lambda path, language=None: [
+        {'start': 0.0, 'end': 1.0, 'text': 'hello'}])
+    client = FakeClient()
+    job = VideoJob(tmp_path / 'ep1.mkv', make_config(tmp_path, project_id=1, client=client))
+    job.state['steps']['subtitles'] = {'outputs': [str(tmp_path / 'ep1.ass')]}
+    job.state['steps']['import'] = {'result': {'task_id': 42, 'annotation_id': 7}}
+
+    _, result = pipeline._run_import(job, [])
+
+    assert result['task_id'] != 42
+    assert [name for name, _ in client.calls] == ['create_task', 'create_annotation']
+
+
+def test_task_id_kept_when_annotation_upload_fails(tmp_path, monkeypatch):
+    monkeypatch.setenv('LABEL_STUDIO_LOCAL_FILES_DOCUMENT_ROOT', str(tmp_path))
+    monkeypatch.setattr(pipeline, 'read_subtitle_file', lambda path, language=None: [
+        {'start': 0.0, 'end': 1.0, 'text': 'hello'}])
+
+    class FlakyClient(FakeClient):
+        failures = 1
+
+        def create_annotation(self, task_id, result, **fields):
+            if self.failures:
+                self.failures -= 1
+                raise LabelStudioError('POST', f'/api/tasks/{task_id}/annotations/', 500, 'error')
+            return super().create_annotation(task_id, result, **fields)
+
+    client = FlakyClient()
+    config = make_config(tmp_path, project_id=1, client=client)
+    job = VideoJob(tmp_path / 'ep1.mkv', config)
+    job.state['steps']['subtitles'] = {'outputs': [str(tmp_path / 'ep1.ass')]}
+    step = [s for s in pipeline.build_steps(config) if s.name == 'import'][0]
+    monkeypatch.setattr(step, 'inputs', lambda job: [])
+
+    with pytest.raises(LabelStudioError):
+        job.execute(step)
+
+    # 重新加载清单，模拟下一次运行
+    job = VideoJob(tmp_path / 'ep1.mkv', config)
+    job.state['steps']['subtitles'] = {'outputs': [str(tmp_path / 'ep1.ass')]}
+    assert job.execute(step)
+
+    assert list(client.tasks) == [1]
+    assert [name for name, _ in client.calls] == [
+        'create_task', 'update_task', 'create_annotation']
+    assert job.result('import')['task_id'] == 1
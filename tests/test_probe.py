@@ -0,0 +1,96 @@
+import json
+import os
+import subprocess
+
+import pytest
+
+from audio_label_studio import extract, probe
+
+
+MKVMERGE_INFO = {
+    'container': {'type': 'Matroska', 'recognized': True, 'supported': True},
+    'tracks': [
+        {'id': 0, 'type': 'video', 'codec': 'AVC/H.264/MPEG-4p10',
+         'properties': {'language': 'und'}},
+        {'id': 1, 'type': 'audio', 'codec': 'FLAC', 'properties': {'language': 'jpn'}},
+        {'id': 2, 'type': 'subtitles', 'codec': 'SubStationAlpha',
+         'properties': {'language': 'JPN', 'track_name': '日本語'}},
+        {'id': 3, 'type': 'subtitles', 'codec': 'SubStationAlpha', 'properties': {}},
+    ],
+}
+
+
+class FakeRun:
+    """记录 subprocess.run 的调用，返回指定的退出码和输出"""
+
+    def __init__(self, returncode=0, stdout=b'', stderr=b''):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.commands = []
+
+    def __call__(self, command, **kwargs):
+        self.commands.append(command)
+        return subprocess.CompletedProcess(command, self.returncode, self.stdout, self.stderr)
+
+
+@pytest.fixture
+def fake_run(monkeypatch):
+    probe.clear_cache()
+    run = FakeRun(stdout=json.dumps(MKVMERGE_INFO).encode('utf-8'),
+                  stderr=b'Warning: some diagnostics')
+    monkeypatch.setattr(subprocess, 'run', run)
+    yield run
+    probe.clear_cache()
+
+
+@pytest.fixture
+def mkv(tmp_path):
+    path = tmp_path / 'ep1.mkv'
+    path.write_bytes(b'matroska')
+    return path
+
+
+def test_subtitle_tracks():
+    assert probe.subtitle_tracks(MKVMERGE_INFO) == [(2, 'jpn'), (3, 'und')]
+
+
+def test_probe_ignores_stderr_and_accepts_warnings(fake_run, mkv):
+    fake_run.returncode = 1
+    assert probe.probe(mkv) == MKVMERGE_INFO
+    assert fake_run.commands == [['mkvmerge', '-J', str(mkv)]]
+
+
+def test_probe_raises_on_error(fake_run, mkv):
+    fake_run.returncode = 2
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        probe.probe(mkv)
+    assert excinfo.value.stderr == b'Warning: some diagnostics'
+
+
+def test_probe_cache_invalidated_by_size_or_mtime(fake_run, mkv):
+    probe.probe(mkv)
+    probe.probe(mkv)
+    assert len(fake_run.commands) == 1
+
+    stat = mkv.stat()
+    os.utime(mkv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    probe.probe(mkv)
+    assert len(fake_run.commands) == 2
+
+    mkv.write_bytes(b'matroska, but longer')
+    os.utime(mkv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    probe.probe(mkv)
+    assert len(fake_run.commands) == 3
+
+
+def test_extract_subtitle_tracks_single_mkvextract_call(fake_run, mkv, tmp_path):
+    outputs = extract.extract_subtitle_tracks(mkv, tmp_path / 'subs')
+
+    assert outputs == [tmp_path / 'subs' / 'ep1_sub2_jpn.sub',
+                       tmp_path / 'subs' / 'ep1_sub3_und.sub']
+    assert fake_run.commands[1:] == [[
+        'mkvextract', 'tracks', str(mkv),
+        f"2:{tmp_path / 'subs' / 'ep1_sub2_jpn.sub'}",
+        f"3:{tmp_path / 'subs' / 'ep1_sub3_und.sub'}",
+    ]]
@@ -0,0 +1,52 @@
+import pstats
+import time
+
+from PIL import Image
+
+from audio_label_studio.model import OCRModel, HedgedOCRModel
+from audio_label_studio.profiling import ProfileController
+
+
+class SlowOCRModel(OCRModel):
+    def __init__(self, delay):
+        self.delay = delay
+
+    def predict(self, image):
+        busy_backend_work(self.delay)
+        return [('text', (0, 0, 1, 1))]
+
+
+def busy_backend_work(seconds):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+
+
+def profile_hedged_request(tmp_path, mode):
+    model = HedgedOCRModel(SlowOCRModel(0.3), SlowOCRModel(0.3), deadline=0.05)
+    controller = ProfileController(tmp_path)
+    controller.profile_requests(1, mode)
+    with controller.request('auto_detect'):
+        model.predict(Image.new('RGB', (8, 8)))
+    return controller.status()['outputs']
+
+
+def test_sampling_includes_hedge_threads(tmp_path):
+    outputs = profile_hedged_request(tmp_path, 'sampling')
+    assert len(outputs) == 1
+    with open(outputs[0], 'r', encoding='utf-8') as f:
+        assert 'busy_backend_work' in f.read()
+
+
+def test_cprofile_includes_hedge_threads(tmp_path):
+    outputs = profile_hedged_request(tmp_path, 'cprofile')
+    assert len(outputs) == 1
+    functions = {name for _, _, name in pstats.Stats(outputs[0]).stats}
+    assert 'busy_backend_work' in functions
+
+
+def test_unprofiled_requests_write_nothing(tmp_path):
+    controller = ProfileController(tmp_path)
+    with controller.request('auto_detect'):
+        pass
+    assert controller.status()['outputs'] == []
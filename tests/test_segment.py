@@ -0,0 +1,103 @@
+import importlib.util
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from audio_label_studio import segment
+from audio_label_studio.segment import (
+    plan_segments, segment_task_data, shift_subtitles, restore_episode_timecodes)
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / 'scripts'
+
+SUBTITLES = [
+    {'start': 12.0, 'end': 14.0, 'text': 'c'},
+    {'start': 0.1, 'end': 2.0, 'text': 'a'},
+    {'start': 3.0, 'end': 3.0, 'text': 'empty'},
+    {'start': 5.0, 'end': 4.0, 'text': 'reversed'},
+    {'start': 2.5, 'end': 9.0, 'text': 'b'},
+    {'start': 40.0, 'end': 41.0, 'text': 'd'},
+]
+
+
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(name, SCRIPTS_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_line_mode_one_segment_per_valid_line():
+    segments = plan_segments(SUBTITLES, mode='line', padding=0.2)
+
+    assert [s['index'] for s in segments] == [0, 1, 2, 3]
+    assert [[x['text'] for x in s['subtitles']] for s in segments] == [['a'], ['b'], ['c'], ['d']]
+    # 开头的 padding 截断到 0
+    assert segments[0]['start'] == 0.0
+    assert segments[1]['start'] == pytest.approx(2.3)
+    assert segments[1]['end'] == pytest.approx(9.2)
+
+
+def test_window_mode_merges_lines_within_window():
+    segments = plan_segments(SUBTITLES, mode='window', window=15.0, padding=0.0)
+
+    assert [[x['text'] for x in s['subtitles']] for s in segments] == [['a', 'b', 'c'], ['d']]
+    assert (segments[0]['start'], segments[0]['end']) == (0.1, 14.0)
+
+
+def test_unknown_mode_rejected():
+    with pytest.raises(ValueError):
+        plan_segments(SUBTITLES, mode='scene')
+
+
+def test_shift_and_restore_round_trip():
+    segments = plan_segments(SUBTITLES, mode='window', window=15.0, padding=0.5)
+    for seg in segments:
+        offset = segment_task_data(seg, '/data/clip.wav', 'ep1.wav')['offset']
+        shifted = shift_subtitles(seg['subtitles'], offset)
+        results = [{'type': 'labels', 'value': {'start': s['start'], 'end': s['end'],
+                                                'labels': [s['text']]}} for s in shifted]
+
+        restored = restore_episode_timecodes(results, offset)
+
+        assert [(r['value']['start'], r['value']['end']) for r in restored] == [
+            (pytest.approx(s['start']), pytest.approx(s['end'])) for s in seg['subtitles']]
+
+
+def test_collect_episode_results():
+    export = load_script('export_segment_annotations')
+    tasks = [
+        {'data': {'episode': 'ep1.wav', 'offset': 30.0},
+         'annotations': [
+             {'result': [{'value': {'start': 9.0, 'end': 9.5}}]},
+             {'result': [{'value': {'start': 1.0, 'end': 2.0}}]},
+         ]},
+        {'data': {'episode': 'ep1.wav', 'offset': 0.0},
+         'annotations': [{'result': [{'value': {'start': 3.0, 'end': 4.0}}]}]},
+        {'data': {'episode': 'ep2.wav', 'offset': 10.0},
+         'annotations': [{'was_cancelled': True, 'result': [{'value': {'start': 0.0}}]}]},
+        {'data': {'audio': 'no-episode.wav'},
+         'annotations': [{'result': [{'value': {'start': 0.0}}]}]},
+    ]
+
+    episodes = export.collect_episode_results(tasks)
+
+    # 取每个任务最后一次标注，还原为整集时间轴并按开始时间排序
+    assert list(episodes) == ['ep1.wav']
+    assert [(r['value']['start'], r['value']['end']) for r in episodes['ep1.wav']] == [
+        (3.0, 4.0), (31.0, 32.0)]
+
+
+def test_cut_segments_caps_outputs_per_call(tmp_path, monkeypatch):
+    commands = []
+    monkeypatch.setattr(subprocess, 'run', lambda command, **kwargs: commands.append(command))
+    monkeypatch.setattr(segment, 'MAX_OUTPUTS_PER_CALL', 4)
+    subtitles = [{'start': float(i), 'end': i + 0.5, 'text': str(i)} for i in range(10)]
+
+    outputs = segment.cut_segments(tmp_path / 'ep1.wav', plan_segments(subtitles),
+                                   tmp_path / 'clips')
+
+    assert len(outputs) == 10
+    assert [command.count('-map') for command in commands] == [4, 4, 2]
+    assert [c[-1] for c in commands] == [str(outputs[3]), str(outputs[7]), str(outputs[9])]
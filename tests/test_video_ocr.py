@@ -0,0 +1,156 @@
+import os
+import stat
+import subprocess
+import sys
+import warnings
+
+import numpy as np
+import pytest
+
+from audio_label_studio import video_ocr
+
+
+WIDTH, HEIGHT = 8, 8
+# band=(0.75, 1.0) 时字幕区域为 8x2，每帧 48 字节
+FRAME_BYTES = WIDTH * 2 * 3
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path, monkeypatch):
+    """
+    在 PATH 中放一个假的 ffmpeg：输出 FAKE_FRAMES 帧，FAKE_EXIT 非零时写 stderr 并以该状态退出
+    """
+    script = tmp_path / 'ffmpeg'
+    script.write_text(
+        f'#!{sys.executable}\n'
+        'import os, sys\n'
+        f'sys.stdout.buffer.write(bytes({FRAME_BYTES}) * int(os.environ["FAKE_FRAMES"]))\n'
+        'sys.stdout.buffer.flush()\n'
+        'code = int(os.environ["FAKE_EXIT"])\n'
+        'if code:\n'
+        '    sys.stderr.write("Invalid data found when processing input\\n")\n'
+        'sys.exit(code)\n')
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv('PATH', f'{tmp_path}{os.pathsep}{os.environ["PATH"]}')
+    monkeypatch.setattr(video_ocr, 'probe_video',
+                        lambda video: {'width': WIDTH, 'height': HEIGHT, 'duration': 1.0})
+    return monkeypatch
+
+
+def test_reads_all_frames(fake_ffmpeg):
+    fake_ffmpeg.setenv('FAKE_FRAMES', '5')
+    fake_ffmpeg.setenv('FAKE_EXIT', '0')
+
+    batches = list(video_ocr.iter_band_frames('video.mkv', batch_size=2))
+
+    assert [index for index, _ in batches] == [0, 2, 4]
+    assert sum(len(frames) for _, frames in batches) == 5
+    assert batches[0][1].shape == (2, 2, WIDTH, 3)
+
+
+def test_ffmpeg_failure_raises_with_stderr(fake_ffmpeg):
+    fake_ffmpeg.setenv('FAKE_FRAMES', '3')
+    fake_ffmpeg.setenv('FAKE_EXIT', '1')
+
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        list(video_ocr.iter_band_frames('video.mkv', batch_size=2))
+
+    assert excinfo.value.returncode == 1
+    assert 'Invalid data' in excinfo.value.stderr
+
+
+def test_stopping_early_does_not_raise(fake_ffmpeg):
+    fake_ffmpeg.setenv('FAKE_FRAMES', '100')
+    fake_ffmpeg.setenv('FAKE_EXIT', '0')
+
+    frames = video_ocr.iter_band_frames('video.mkv', batch_size=2)
+    assert next(frames)[0] == 0
+    frames.close()
+
+
+class CountingOCRModel:
+    """按调用顺序返回预设文本，并记录调用次数"""
+
+    def __init__(self, texts):
+        self.texts = list(texts)
+        self.calls = 0
+
+    def predict(self, image):
+        text = self.texts[self.calls]
+        self.calls += 1
+        return [(text, (0, 0, image.width, image.height))] if text else []
+
+
+def text_band(seed, shape=(16, 66)):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, size=(*shape, 3), dtype=np.uint8)
+
+
+def blank_band(shape=(16, 66)):
+    return np.full((*shape, 3), 30, dtype=np.uint8)
+
+
+def run_extract(monkeypatch, bands, texts, batch_size=3, fps=2.0):
+    def fake_frames(video, fps=2.0, band=(0.75, 1.0)):
+        for first in range(0, len(bands), batch_size):
+            yield first, np.stack(bands[first:first + batch_size])
+
+    monkeypatch.setattr(video_ocr, 'iter_band_frames', fake_frames)
+    model = CountingOCRModel(texts)
+    segments, stats = video_ocr.extract_hard_subtitles('video.mkv', model, fps=fps)
+    return segments, stats, model
+
+
+def test_identical_bands_reuse_text(monkeypatch):
+    a = text_band(1)
+    segments, stats, model = run_extract(monkeypatch, [a, a.copy(), a.copy(), a.copy()], ['你好'])
+
+    assert model.calls == 1
+    assert stats == {'frames': 4, 'ocr_calls': 1, 'blank_frames': 0}
+    assert segments == [{'start': 0.0, 'end': 2.0, 'text': '你好'}]
+
+
+def test_changed_band_triggers_ocr_and_segments_merge(monkeypatch):
+    a, b = text_band(1), text_band(2)
+    bands = [a, a, blank_band(), b, b, b, a]
+    segments, stats, model = run_extract(monkeypatch, bands, ['一', '二', '一'])
+
+    assert model.calls == 3
+    assert stats['blank_frames'] == 1
+    assert segments == [
+        {'start': 0.0, 'end': 1.0, 'text': '一'},
+        {'start': 1.5, 'end': 3.0, 'text': '二'},
+        {'start': 3.0, 'end': 3.5, 'text': '一'},
+    ]
+
+
+def test_blank_bands_skip_ocr(monkeypatch):
+    segments, stats, model = run_extract(monkeypatch, [blank_band()] * 5, [])
+
+    assert model.calls == 0
+    assert stats['blank_frames'] == 5
+    assert segments == []
+
+
+def test_text_after_blank_is_recognised_again(monkeypatch):
+    # 空白帧之后即使画面与之前相同也重新识别
+    a = text_band(1)
+    segments, _, model = run_extract(monkeypatch, [a, blank_band(), a], ['一', '一'], fps=1.0)
+
+    assert model.calls == 2
+    assert segments == [{'start': 0.0, 'end': 1.0, 'text': '一'},
+                        {'start': 2.0, 'end': 3.0, 'text': '一'}]
+
+
+@pytest.mark.parametrize('shape', [(2, 66), (16, 20), (4, 8)])
+def test_difference_hash_small_bands(shape):
+    frames = np.stack([text_band(1, shape), text_band(2, shape)])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        hashes, contrast = video_ocr.difference_hash(frames)
+
+    assert hashes.shape == (2, 8 * 32)
+    assert np.all(contrast > 0)
+    assert hashes[0].any()
+    assert np.count_nonzero(hashes[0] != hashes[1]) > 12
@@ -0,0 +1,48 @@
+import struct
+
+import numpy as np
+
+from audio_label_studio.wav import read_wav_info, iter_mono_chunks
+
+
+def write_wav(path, samples, sample_rate=16000):
+    """写出 int16 PCM 或 float32 WAV，samples 形状为 (frames, channels)"""
+    samples = np.asarray(samples)
+    channels = samples.shape[1]
+    audio_format = 3 if samples.dtype.kind == 'f' else 1
+    bits = samples.dtype.itemsize * 8
+    data = samples.tobytes()
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<4sI4s', b'RIFF', 36 + len(data), b'WAVE'))
+        f.write(struct.pack('<4sIHHIIHH', b'fmt ', 16, audio_format, channels, sample_rate,
+                            sample_rate * channels * bits // 8, channels * bits // 8, bits))
+        f.write(struct.pack('<4sI', b'data', len(data)))
+        f.write(data)
+
+
+def collect(path, chunk_frames):
+    info = read_wav_info(path)
+    return info, list(iter_mono_chunks(path, info, chunk_frames))
+
+
+def test_mono_float_chunks(tmp_path):
+    path = tmp_path / 'mono.wav'
+    samples = np.linspace(-0.5, 0.5, 1000, dtype='<f4').reshape(-1, 1)
+    write_wav(path, samples)
+
+    info, chunks = collect(path, 300)
+
+    assert info.frames == 1000
+    assert [start for start, _ in chunks] == [0, 300, 600, 900]
+    np.testing.assert_allclose(np.concatenate([c for _, c in chunks]), samples[:, 0])
+
+
+def test_stereo_int16_chunks_are_normalized(tmp_path):
+    path = tmp_path / 'stereo.wav'
+    samples = np.array([[16384, 0], [-32768, -32768], [0, 16384]], dtype='<i2')
+    write_wav(path, samples)
+
+    _, chunks = collect(path, 2)
+
+    mono = np.concatenate([c for _, c in chunks])
+    np.testing.assert_allclose(mono, [0.25, -1.0, 0.25])